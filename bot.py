@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import sys
@@ -5,6 +6,8 @@ import sys
 import discord
 from discord.ext import commands
 
+from managers.registry import ManagerRegistry
+
 # ロガーの設定
 logging.basicConfig(
     level=logging.INFO,
@@ -32,6 +35,11 @@ class ThoughtBot(commands.Bot):
         """起動時の初期化処理"""
         logger.info("ボットの初期化を開始します...")
         
+        # 全Cogで共有するマネージャーを1回だけ生成
+        self.managers = ManagerRegistry()
+        # 検索用インデックスはイベントループの外で構築しておく（モーダルの応答期限に間に合わせるため）
+        await asyncio.to_thread(self.managers.post_manager.warm_search_indexes)
+        
         # Cogの読み込み
         await self.load_cogs()
         
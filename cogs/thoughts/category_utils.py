@@ -0,0 +1,54 @@
+"""
+カテゴリー集計のユーティリティ
+"""
+
+import logging
+from typing import List, Dict, Any, Tuple
+
+# ロガー設定
+logger = logging.getLogger(__name__)
+
+# 定数
+MAX_PLACEHOLDER_LENGTH = 100  # Discordのプレースホルダーの上限
+MAX_CATEGORY_HINTS = 5
+MAX_RESULT_CATEGORIES = 5
+
+def category_placeholder(post_manager, placeholder: str) -> str:
+    """よく使われているカテゴリーを入力例としてプレースホルダーに追加
+    
+    モーダルのテキスト入力では補完が使えないため、入力例として既存のカテゴリーを表示する。
+    インデックスが未構築の場合は構築に時間がかかり応答期限（3秒）に間に合わないことがあるため、入力例は付けない。
+    """
+    if not post_manager.search_indexes_ready():
+        return placeholder
+    
+    try:
+        counts = post_manager.get_category_counts(limit=MAX_CATEGORY_HINTS)
+    except Exception as e:
+        logger.warning(f"カテゴリー一覧の取得に失敗: {e}")
+        return placeholder
+    
+    hint = placeholder
+    for i, (label, _) in enumerate(counts):
+        candidate = f"{hint} 例: {label}" if i == 0 else f"{hint}, {label}"
+        if len(candidate) > MAX_PLACEHOLDER_LENGTH:
+            break
+        hint = candidate
+    return hint
+
+def result_category_counts(post_manager, results: List[Dict[str, Any]]) -> List[Tuple[str, int]]:
+    """検索結果に含まれるカテゴリーの全体での投稿数（多い順）"""
+    labels: Dict[str, None] = {}
+    for post in results:
+        label = (post.get('category') or '').strip()
+        if label:
+            labels.setdefault(label, None)
+    
+    try:
+        counts = [(label, post_manager.get_category_count(label)) for label in labels]
+    except Exception as e:
+        logger.warning(f"カテゴリー別の投稿数の取得に失敗: {e}")
+        return []
+    
+    counts.sort(key=lambda item: -item[1])
+    return counts[:MAX_RESULT_CATEGORIES]
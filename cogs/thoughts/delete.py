@@ -10,8 +10,7 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.registry import get_managers
 
 # ユーティリティをインポート
 from .delete_utils import delete_discord_message, cleanup_message_ref
@@ -23,8 +22,9 @@ class Delete(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
+        self.message_ref_manager = managers.message_ref_manager
     
     @app_commands.command(name="delete", description="🗑️ 投稿を削除")
     async def delete_post(self, interaction: Interaction) -> None:
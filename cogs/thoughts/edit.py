@@ -12,7 +12,7 @@ from typing import List, Dict, Any
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
+from managers.registry import get_managers
 
 # UIとユーティリティをインポート
 from .edit_modal import PostEditModal, PostEditSelectView
@@ -25,7 +25,8 @@ class Edit(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
     
     @app_commands.command(name='edit', description='📝 投稿を編集')
     async def edit(self, interaction: discord.Interaction):
@@ -88,8 +89,7 @@ class Edit(commands.Cog):
                 return False
             
             # Discordメッセージを更新
-            from managers.message_ref_manager import MessageRefManager
-            message_ref_manager = MessageRefManager()
+            message_ref_manager = get_managers(self.bot).message_ref_manager
             
             message_ref_data = message_ref_manager.get_message_ref(post_id)
             if message_ref_data:
@@ -8,6 +8,8 @@ from discord.ext import commands
 import logging
 from typing import List, Dict, Any
 
+from .category_utils import category_placeholder
+
 logger = logging.getLogger(__name__)
 
 class PostEditSelectView(ui.View):
@@ -81,7 +83,7 @@ class PostEditModal(ui.Modal, title="投稿を編集"):
         
         self.category = ui.TextInput(
             label='📁 カテゴリー',
-            placeholder='カテゴリーを入力（任意）',
+            placeholder=category_placeholder(cog.post_manager, 'カテゴリーを入力（任意）'),
             required=False,
             style=discord.TextStyle.short,
             max_length=50,
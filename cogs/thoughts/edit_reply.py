@@ -12,7 +12,7 @@ from typing import List, Dict, Any
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.reply_manager import ReplyManager
+from managers.registry import get_managers
 
 # UIとユーティリティをインポート
 from .edit_reply_modal import ReplyEditModal, ReplyEditSelectView
@@ -25,7 +25,8 @@ class EditReply(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.reply_manager = ReplyManager()
+        managers = get_managers(bot)
+        self.reply_manager = managers.reply_manager
     
     @app_commands.command(name='edit_reply', description='💬 リプライを編集')
     async def edit_reply(self, interaction: discord.Interaction):
@@ -84,8 +85,7 @@ class EditReply(commands.Cog):
                 return False
             
             # Discordメッセージを更新
-            from managers.message_ref_manager import MessageRefManager
-            message_ref_manager = MessageRefManager()
+            message_ref_manager = get_managers(self.bot).message_ref_manager
             
             message_ref_data = message_ref_manager.get_message_ref(reply_id)
             if message_ref_data:
@@ -15,6 +15,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from managers.like_manager import LikeManager
 from managers.post_manager import PostManager
 from managers.message_ref_manager import MessageRefManager
+from managers.post_query import PostQuery, VISIBILITY_PUBLIC
+from managers.registry import get_managers
 from config import get_channel_id, extract_channel_id
 
 logger = logging.getLogger(__name__)
@@ -45,7 +47,10 @@ class LikeModal(ui.Modal, title="❤️ いいねする投稿"):
             post_id = int(self.post_id_input.value.strip())
             
             # 投稿情報を取得
-            post = self.post_manager.get_post(post_id, str(interaction.user.id))
+            # 存在しないIDは所在インデックスだけで判定し、ファイルを読まない
+            post = None
+            if self.post_manager.post_exists(post_id):
+                post = self.post_manager.get_post(post_id, str(interaction.user.id))
             
             if not post:
                 await interaction.followup.send(
@@ -144,9 +149,10 @@ class Like(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.like_manager = LikeManager()
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        managers = get_managers(bot)
+        self.like_manager = managers.like_manager
+        self.post_manager = managers.post_manager
+        self.message_ref_manager = managers.message_ref_manager
         logger.info("Like cog が初期化されました")
     
     @app_commands.command(name='like', description='❤️ 投稿にいいねする')
@@ -155,8 +161,8 @@ class Like(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 全ての投稿を取得
-            posts = self.post_manager.search_posts()
+            # セレクトメニューに表示できる新しい順の25件だけを読み込む
+            posts = list(self.post_manager.query_posts(PostQuery(visibility=VISIBILITY_PUBLIC, limit=25)))
             
             if not posts:
                 await interaction.followup.send(
@@ -166,9 +172,6 @@ class Like(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # 選択ビューを表示
             from .like_select import LikeSelectView
             view = LikeSelectView(posts, self)
@@ -10,7 +10,7 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
+from managers.registry import get_managers
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -29,7 +29,9 @@ class List(commands.Cog):
             bot: Discord Bot インスタンス
         """
         self.bot: commands.Bot = bot
-        self.post_manager = PostManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
+        self.count_manager = managers.count_manager
         logger.info("List cog が初期化されました")
 
     @app_commands.command(name='list', description='📋 あなたの投稿一覧を表示')
@@ -43,8 +45,11 @@ class List(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 自分の投稿を取得
-            my_posts = self.post_manager.search_posts(user_id=str(interaction.user.id))
+            # 投稿者インデックスから自分の投稿だけを新しい順に取得
+            user_id = str(interaction.user.id)
+            my_posts = list(self.post_manager.iter_posts(
+                user_id, post_ids=self.post_manager.post_ids_by_user(user_id, newest_first=True)
+            ))
             
             if not my_posts:
                 embed = Embed(
@@ -55,9 +60,6 @@ class List(commands.Cog):
                 await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
-            # 作成日時でソート
-            my_posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # Embedを作成
             embed = Embed(
                 title="📋 あなたの投稿一覧",
@@ -65,6 +67,9 @@ class List(commands.Cog):
                 color=discord.Color.blue()
             )
             
+            # いいね数・リプライ数をまとめて取得
+            counts = self.count_manager.get_counts_bulk(post['id'] for post in my_posts)
+            
             for post in my_posts:
                 # 投稿内容（文字数制限なし）
                 content = post.get('content', '')
@@ -72,9 +77,13 @@ class List(commands.Cog):
                 # 公開/非公開ステータス
                 status = "🔒 非公開" if post.get('is_private') else "🌐 公開"
                 
+                # いいね数・リプライ数
+                post_counts = counts.get(post['id'], {})
+                engagement = f"❤️ {post_counts.get('likes', 0)} 💬 {post_counts.get('replies', 0)}"
+                
                 # フィールドを追加
                 embed.add_field(
-                    name=f"ID: {post['id']} ({status})",
+                    name=f"ID: {post['id']} ({status}) {engagement}",
                     value=content,
                     inline=False
                 )
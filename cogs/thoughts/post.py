@@ -12,8 +12,7 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.message_ref_manager import MessageRefManager
+from managers.registry import get_managers
 from config import get_channel_id, DEFAULT_AVATAR, extract_channel_id
 
 # モーダルとユーティリティをインポート
@@ -26,8 +25,9 @@ logger = logging.getLogger(__name__)
 class Post(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
+        self.message_ref_manager = managers.message_ref_manager
         logger.info("Post cog が初期化されました")
 
     @app_commands.command(name="post", description="📝 新規投稿を作成")
@@ -11,7 +11,7 @@ import os
 from typing import Optional, Dict, Any
 
 from config import get_channel_id, extract_channel_id, DEFAULT_AVATAR
-from managers.post_manager import PostManager
+from managers.registry import get_managers
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,8 @@ class PostMessageManager:
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
     
     def create_embed(self, message: str, category: Optional[str], post_id: int, 
                    is_anonymous: bool, user: discord.User, image_url: Optional[str] = None,
@@ -157,9 +158,7 @@ class PostMessageManager:
             
             # 投稿データのmessage_idとchannel_idを更新
             try:
-                from managers.post_manager import PostManager
-                post_cog = PostManager()
-                post_cog.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
+                self.post_manager.update_post_message_ref(post_id, str(sent_message.id), str(sent_message.channel.id))
             except Exception as e:
                 logger.warning(f"投稿のmessage_ref更新中にエラー: {e}")
                 
@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from managers.post_manager import PostManager
 from managers.message_ref_manager import MessageRefManager
 from config import get_channel_id, DEFAULT_AVATAR
+from .category_utils import category_placeholder
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -33,7 +34,7 @@ class PostModal(ui.Modal, title='新規投稿'):
         
         self.category = ui.TextInput(
             label='📁 カテゴリー',
-            placeholder='カテゴリーを入力（任意）',
+            placeholder=category_placeholder(cog.post_manager, 'カテゴリーを入力（任意）'),
             required=False,
             style=discord.TextStyle.short,
             max_length=50
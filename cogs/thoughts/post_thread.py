@@ -11,7 +11,7 @@ import os
 from typing import Optional, Dict, Any
 
 from config import get_channel_id, extract_channel_id
-from managers.post_manager import PostManager
+from managers.registry import get_managers
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,8 @@ class PostThreadManager:
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.post_manager = PostManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
     
     async def create_private_thread(self, interaction: Interaction, user_id: str, post_id: int) -> Optional[discord.Thread]:
         """プライベートスレッドを作成する"""
@@ -15,6 +15,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from managers.reply_manager import ReplyManager
 from managers.post_manager import PostManager
 from managers.message_ref_manager import MessageRefManager
+from managers.post_query import PostQuery, VISIBILITY_PUBLIC
+from managers.registry import get_managers
 from config import get_channel_id, extract_channel_id
 
 logger = logging.getLogger(__name__)
@@ -55,7 +57,10 @@ class ReplyModal(ui.Modal, title="💬 リプライする投稿"):
             reply_content = self.reply_input.value.strip()
             
             # 親投稿の存在確認
-            parent_post = self.post_manager.get_post(post_id, str(interaction.user.id))
+            # 存在しないIDは所在インデックスだけで判定し、ファイルを読まない
+            parent_post = None
+            if self.post_manager.post_exists(post_id):
+                parent_post = self.post_manager.get_post(post_id, str(interaction.user.id))
             
             if not parent_post:
                 await interaction.followup.send(
@@ -160,9 +165,10 @@ class Reply(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.reply_manager = ReplyManager()
-        self.post_manager = PostManager()
-        self.message_ref_manager = MessageRefManager()
+        managers = get_managers(bot)
+        self.reply_manager = managers.reply_manager
+        self.post_manager = managers.post_manager
+        self.message_ref_manager = managers.message_ref_manager
         logger.info("Reply cog が初期化されました")
     
     @app_commands.command(name='reply', description='💬 投稿にリプライする')
@@ -171,8 +177,8 @@ class Reply(commands.Cog):
         try:
             await interaction.response.defer(ephemeral=True)
             
-            # 全ての投稿を取得
-            posts = self.post_manager.search_posts()
+            # セレクトメニューに表示できる新しい順の25件だけを読み込む
+            posts = list(self.post_manager.query_posts(PostQuery(visibility=VISIBILITY_PUBLIC, limit=25)))
             
             if not posts:
                 await interaction.followup.send(
@@ -182,9 +188,6 @@ class Reply(commands.Cog):
                 )
                 return
             
-            # 作成日時でソート
-            posts.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            
             # 選択ビューを表示
             from .reply_select import ReplySelectView
             view = ReplySelectView(posts, self)
@@ -3,9 +3,10 @@ Disgle検索機能 - 完全に動作するバージョン
 Google風の検索インターフェースと完全な機能
 """
 
+import asyncio
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
 
 import discord
@@ -16,11 +17,9 @@ from discord.ext import commands
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from managers.post_manager import PostManager
-from managers.reply_manager import ReplyManager
-from managers.like_manager import LikeManager
-from managers.message_ref_manager import MessageRefManager
-from managers.action_manager import ActionManager
+from managers.count_manager import attach_counts
+from managers.registry import get_managers
+from managers.search_session import SearchSession
 from config import get_channel_id, extract_channel_id
 
 # モーダルとユーティリティをインポート
@@ -28,6 +27,7 @@ from .search_modal import SearchModal
 from .search_type_view import SearchTypeView
 from .search_pagination import SearchResultsView
 from .search_utils import search_posts, search_replies, create_search_embed
+from .category_utils import result_category_counts
 
 # ロガー設定
 logger = logging.getLogger(__name__)
@@ -44,11 +44,14 @@ class Search(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.post_manager = PostManager()
-        self.reply_manager = ReplyManager()
-        self.like_manager = LikeManager()
-        self.message_ref_manager = MessageRefManager()
-        self.action_manager = ActionManager()
+        managers = get_managers(bot)
+        self.post_manager = managers.post_manager
+        self.reply_manager = managers.reply_manager
+        self.like_manager = managers.like_manager
+        self.message_ref_manager = managers.message_ref_manager
+        self.action_manager = managers.action_manager
+        self.count_manager = managers.count_manager
+        self.search_sessions = managers.search_sessions
         logger.info("Search cog が初期化されました")
     
     @app_commands.command(name="search", description="🔍 投稿を検索")
@@ -76,17 +79,31 @@ class Search(commands.Cog):
             )
     
         
-    async def show_search_results(self, interaction: Interaction, results: List[Dict[str, Any]], search_type: str) -> None:
-        """検索結果を表示"""
+    async def show_search_results(self, interaction: Interaction, results: List[Dict[str, Any]], search_type: str,
+                                  remaining: Optional[Iterator[Dict[str, Any]]] = None) -> None:
+        """検索結果を表示（remainingがある場合は最初のページを先に送信し、残りと総件数は後から反映）"""
         try:
+            # 投稿にはいいね数・リプライ数とカテゴリーごとの投稿数を付与
+            category_counts = None
+            if search_type == "投稿":
+                attach_counts(results, self.count_manager)
+                category_counts = result_category_counts(self.post_manager, results)
+            
+            counting = remaining is not None
+            
             # Embedを作成
-            embed = create_search_embed(results, search_type)
+            embed = create_search_embed(results, search_type, category_counts=category_counts, counting=counting)
             
-            # ビューを作成
-            view = SearchResultsView(self, results, search_type)
+            # 結果はIDの並びだけを検索セッションに保持し、ページ送りの際に読み込む
+            session = SearchSession(search_type, [item['id'] for item in results], category_counts)
+            session_id = self.search_sessions.add(session)
+            view = SearchResultsView(self, session_id, search_type, len(results), counting=counting)
             
             # 結果を送信
-            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+            message = await interaction.followup.send(embed=embed, view=view, ephemeral=True, wait=counting)
+            
+            if counting:
+                await self._finish_search_results(message, view, session_id, session, results, remaining)
             
         except Exception as e:
             logger.error(f"検索結果表示中にエラー: {e}", exc_info=True)
@@ -96,6 +113,38 @@ class Search(commands.Cog):
                 ephemeral=True
             )
     
+    async def _finish_search_results(self, message: discord.WebhookMessage, view: SearchResultsView,
+                                     session_id: str, session: SearchSession,
+                                     results: List[Dict[str, Any]], remaining: Iterator[Dict[str, Any]]) -> None:
+        """残りの結果をスレッドで読み込み、総件数とページボタンを更新"""
+        try:
+            rest = await asyncio.to_thread(list, remaining)
+        except Exception as e:
+            # 残りが読めなくても表示済みの結果はそのまま使えるようにする
+            logger.error(f"残りの検索結果の取得中にエラー: {e}", exc_info=True)
+            rest = []
+        
+        results = results + rest
+        if session.search_type == "投稿":
+            attach_counts(rest, self.count_manager)
+            session.category_counts = result_category_counts(self.post_manager, results)
+        session.result_ids = [item['id'] for item in results]
+        self.search_sessions.update(session_id, session)
+        
+        view.finish_counting(len(results))
+        embed = create_search_embed(results, session.search_type, view.current_page, view.total_pages,
+                                    session.category_counts)
+        await message.edit(embed=embed, view=view)
+    
+    def load_search_page(self, session: SearchSession, page: int) -> List[Dict[str, Any]]:
+        """検索セッションの指定ページの投稿・リプライを読み込む（削除されたものは除く）"""
+        page_ids = session.page_ids(page, ITEMS_PER_PAGE)
+        if session.search_type == "投稿":
+            posts = list(self.post_manager.iter_posts(post_ids=page_ids))
+            attach_counts(posts, self.count_manager)
+            return posts
+        return self.reply_manager.get_replies_by_ids(page_ids)
+    
     def _get_post_stats(self) -> Dict[str, int]:
         """投稿統計を取得"""
         try:
@@ -109,6 +158,11 @@ class Search(commands.Cog):
                 'with_category': len([p for p in all_posts if p.get('category')])
             }
             
+            # いいね数・リプライ数はカウンターから取得（全件走査しない）
+            totals = self.count_manager.get_totals()
+            stats['likes'] = totals['likes']
+            stats['replies'] = totals['replies']
+            
             return stats
             
         except Exception as e:
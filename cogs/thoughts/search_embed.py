@@ -4,7 +4,7 @@
 
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 import discord
 from discord import app_commands, ui, Interaction, Embed
@@ -20,15 +20,21 @@ def create_search_embed(
     results: List[Dict[str, Any]],
     search_type: str,
     page: int = 1,
-    total_pages: int = 1
+    total_pages: int = 1,
+    category_counts: Optional[List[Tuple[str, int]]] = None,
+    counting: bool = False,
+    total_count: Optional[int] = None
 ) -> Embed:
-    """検索結果のEmbedを作成"""
+    """検索結果のEmbedを作成（category_countsがあればカテゴリーごとの投稿数も表示、counting中は総件数を集計中と表示）
+    
+    total_countを指定した場合、resultsは表示するページの分だけとして扱う。
+    """
     embed = discord.Embed(
         title=f"🔍 {search_type}検索結果",
         color=discord.Color.blue()
     )
     
-    if not results:
+    if not results and not total_count:
         embed.description = "検索結果が見つかりませんでした。"
         embed.add_field(
             name="💡 ヒント",
@@ -39,8 +45,11 @@ def create_search_embed(
     
     # 結果を表示
     start_idx = (page - 1) * ITEMS_PER_PAGE
-    end_idx = start_idx + ITEMS_PER_PAGE
-    page_results = results[start_idx:end_idx]
+    if total_count is None:
+        total_count = len(results)
+        page_results = results[start_idx:start_idx + ITEMS_PER_PAGE]
+    else:
+        page_results = results
     
     for i, item in enumerate(page_results, start=start_idx + 1):
         if search_type == "投稿":
@@ -55,6 +64,10 @@ def create_search_embed(
             field_name = f"📝 {i}. 投稿ID: {post_id}"
             field_value = f"**著者:** {author}\n**カテゴリー:** {category}\n**内容:** {content}\n**作成日:** {created_at}"
             
+            # いいね数・リプライ数（カウンターから付与されている場合のみ）
+            if 'like_count' in item:
+                field_value += f"\n**反応:** ❤️ {item.get('like_count', 0)} / 💬 {item.get('reply_count', 0)}"
+            
         elif search_type == "リプライ":
             content = item.get('content', '')[:200] + "..." if len(item.get('content', '')) > 200 else item.get('content', '')
             reply_id = item.get('id', '不明')
@@ -70,9 +83,20 @@ def create_search_embed(
             inline=False
         )
     
+    # 結果に含まれるカテゴリーの全体での投稿数
+    if category_counts:
+        embed.add_field(
+            name="📁 カテゴリー別の投稿数",
+            value=" / ".join(f"{label}: {count}件" for label, count in category_counts),
+            inline=False
+        )
+    
     # フッター情報
-    embed.set_footer(
-        text=f"ページ {page}/{total_pages} | 全{len(results)}件の結果"
-    )
+    if counting:
+        embed.set_footer(text=f"ページ {page}/… | 残りの結果と件数を集計中…")
+    else:
+        embed.set_footer(
+            text=f"ページ {page}/{total_pages} | 全{total_count}件の結果"
+        )
     
     return embed
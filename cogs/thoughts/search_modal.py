@@ -4,6 +4,7 @@
 
 import logging
 import os
+from itertools import islice
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
@@ -11,27 +12,32 @@ import discord
 from discord import app_commands, ui, Interaction
 from discord.ext import commands
 
+from .category_utils import category_placeholder
+
 # ロガー設定
 logger = logging.getLogger(__name__)
 
 class SearchModal(ui.Modal, title='🔍 詳細検索'):
     """詳細検索用モーダル"""
     
-    def __init__(self, cog) -> None:
+    def __init__(self, cog, search_type: str = "投稿", fuzzy: bool = False) -> None:
         super().__init__(timeout=None)
         self.cog = cog
+        self.search_type = search_type
+        # あいまい検索では誤字・表記揺れを許容し、キーワードに似ている順に並べる
+        self.fuzzy = fuzzy
         
         self.keyword = ui.TextInput(
-            label='🔍 キーワード',
-            placeholder='検索キーワードを入力（任意）',
-            required=False,
+            label='🔤 キーワード（あいまい検索）' if fuzzy else '🔍 キーワード',
+            placeholder='多少の誤字があっても似ている順に表示します' if fuzzy else '検索キーワードを入力（任意）',
+            required=fuzzy,
             style=discord.TextStyle.short,
             max_length=100
         )
         
         self.category = ui.TextInput(
             label='📁 カテゴリー',
-            placeholder='カテゴリーで絞り込み（任意）',
+            placeholder=category_placeholder(cog.post_manager, 'カテゴリーで絞り込み（任意）'),
             required=False,
             style=discord.TextStyle.short,
             max_length=50
@@ -62,7 +68,9 @@ class SearchModal(ui.Modal, title='🔍 詳細検索'):
         )
         
         self.add_item(self.keyword)
-        self.add_item(self.category)
+        # リプライにはカテゴリーがない
+        if search_type == "投稿":
+            self.add_item(self.category)
         self.add_item(self.author_id)
         self.add_item(self.date_from)
         self.add_item(self.date_to)
@@ -74,7 +82,7 @@ class SearchModal(ui.Modal, title='🔍 詳細検索'):
             
             # フォームデータを取得
             keyword = self.keyword.value.strip() if self.keyword.value else None
-            category = self.category.value.strip() if self.category.value else None
+            category = self.category.value.strip() if self.search_type == "投稿" and self.category.value else None
             author_id = self.author_id.value.strip() if self.author_id.value else None
             date_from_str = self.date_from.value.strip() if self.date_from.value else None
             date_to_str = self.date_to.value.strip() if self.date_to.value else None
@@ -98,17 +106,41 @@ class SearchModal(ui.Modal, title='🔍 詳細検索'):
             # 匿名フィルター（デフォルトは含まない）
             is_anonymous = None
             
-            # 検索実行
-            from .search_utils import search_posts
-            results = search_posts(
+            if self.search_type == "リプライ":
+                from .search_utils import search_replies
+                results = search_replies(
+                    keyword=keyword,
+                    author_id=author_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    reply_manager=self.cog.reply_manager,
+                    fuzzy=self.fuzzy
+                )
+                if not results:
+                    await interaction.followup.send(
+                        "❌ **検索結果がありません**\n\n"
+                        "指定された条件に一致するリプライが見つかりませんでした。",
+                        ephemeral=True
+                    )
+                    return
+                
+                await self.cog.show_search_results(interaction, results, "リプライ")
+                return
+            
+            # 検索実行（最初のページ分だけ読み込み、残りは結果の表示後に読み込む）
+            from .search_utils import iter_search_posts
+            from .search_pagination import ITEMS_PER_PAGE
+            remaining = iter_search_posts(
                 keyword=keyword,
                 category=category,
                 author_id=author_id,
                 date_from=date_from,
                 date_to=date_to,
                 is_anonymous=is_anonymous,
-                post_manager=self.cog.post_manager
+                post_manager=self.cog.post_manager,
+                fuzzy=self.fuzzy
             )
+            results = list(islice(remaining, ITEMS_PER_PAGE))
             
             if not results:
                 await interaction.followup.send(
@@ -119,7 +151,7 @@ class SearchModal(ui.Modal, title='🔍 詳細検索'):
                 return
             
             # 結果を表示
-            await self.cog.show_search_results(interaction, results, "投稿")
+            await self.cog.show_search_results(interaction, results, "投稿", remaining=remaining)
             
         except Exception as e:
             logger.error(f"検索モーダル送信中にエラー: {e}", exc_info=True)
@@ -4,12 +4,14 @@
 
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 import discord
 from discord import app_commands, ui, Interaction
 from discord.ext import commands
 
+from managers.search_session import SEARCH_SESSION_TTL_SECONDS
+
 # ロガー設定
 logger = logging.getLogger(__name__)
 
@@ -19,25 +21,43 @@ ITEMS_PER_PAGE = 3
 class SearchResultsView(ui.View):
     """検索結果表示用ビュー"""
     
-    def __init__(self, cog, results: List[Dict[str, Any]], search_type: str):
-        super().__init__(timeout=None)
+    def __init__(self, cog, session_id: str, search_type: str, total_count: int, counting: bool = False):
+        # 結果はサーバー側の検索セッションにIDだけを保持し、ビューはセッションと同じ時間で破棄する
+        super().__init__(timeout=SEARCH_SESSION_TTL_SECONDS)
         self.cog = cog
-        self.results = results
+        self.session_id = session_id
         self.search_type = search_type
+        # 残りの結果を集計中の間はページ移動できない
+        self.counting = counting
         self.current_page = 1
-        self.total_pages = (len(results) + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        self.total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
         
         # ボタンを追加
         self._add_buttons()
     
+    def finish_counting(self, total_count: int):
+        """集計が終わった総件数でページボタンを更新"""
+        self.counting = False
+        self.total_pages = (total_count + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE
+        if self.total_pages > 1:
+            self._refresh_buttons()
+        else:
+            self.clear_items()
+    
+    def _refresh_buttons(self):
+        """ボタンの状態を更新"""
+        self.prev_button.disabled = self.counting or self.current_page <= 1
+        self.next_button.disabled = self.counting or self.current_page >= self.total_pages
+        self.page_button.label = f'{self.current_page}/{"…" if self.counting else self.total_pages}'
+    
     def _add_buttons(self):
         """ボタンを追加"""
-        if self.total_pages > 1:
+        if self.counting or self.total_pages > 1:
             # 前のページボタン
             self.prev_button = ui.Button(
                 label='◀️ 前へ',
                 style=discord.ButtonStyle.secondary,
-                disabled=self.current_page <= 1
+                disabled=self.counting or self.current_page <= 1
             )
             self.prev_button.callback = self.prev_page_callback
             self.add_item(self.prev_button)
@@ -46,14 +66,14 @@ class SearchResultsView(ui.View):
             self.next_button = ui.Button(
                 label='次へ ▶️',
                 style=discord.ButtonStyle.secondary,
-                disabled=self.current_page >= self.total_pages
+                disabled=self.counting or self.current_page >= self.total_pages
             )
             self.next_button.callback = self.next_page_callback
             self.add_item(self.next_button)
             
             # ページ情報ボタン
             self.page_button = ui.Button(
-                label=f'{self.current_page}/{self.total_pages}',
+                label=f'{self.current_page}/{"…" if self.counting else self.total_pages}',
                 style=discord.ButtonStyle.primary,
                 disabled=True
             )
@@ -71,21 +91,36 @@ class SearchResultsView(ui.View):
             self.current_page += 1
             await self._update_page(interaction)
     
+    async def on_timeout(self):
+        """操作されないまま期限が来たら検索セッションも破棄"""
+        self.cog.search_sessions.discard(self.session_id)
+    
     async def _update_page(self, interaction: Interaction):
-        """ページを更新"""
+        """ページを更新（表示するページの分だけを読み込む）"""
+        session = self.cog.search_sessions.get(self.session_id)
+        if session is None:
+            for item in self.children:
+                item.disabled = True
+            await interaction.response.edit_message(
+                content="⌛ 検索結果の有効期限が切れました。もう一度検索してください。",
+                view=self
+            )
+            return
+        
         # Embedを再作成
         from .search_embed import create_search_embed
         embed = create_search_embed(
-            self.results,
+            self.cog.load_search_page(session, self.current_page),
             self.search_type,
             self.current_page,
-            self.total_pages
+            self.total_pages,
+            session.category_counts,
+            self.counting,
+            total_count=len(session.result_ids)
         )
         
         # ボタンの状態を更新
-        if self.total_pages > 1:
-            self.prev_button.disabled = self.current_page <= 1
-            self.next_button.disabled = self.current_page >= self.total_pages
-            self.page_button.label = f'{self.current_page}/{self.total_pages}'
+        if self.counting or self.total_pages > 1:
+            self._refresh_buttons()
         
         await interaction.response.edit_message(embed=embed, view=self)
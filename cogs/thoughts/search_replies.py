@@ -12,6 +12,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from managers.reply_manager import ReplyManager
+from managers.time_index import to_epoch
+from managers.text_index import normalize_text
 
 # ロガー設定
 logger = logging.getLogger(__name__)
@@ -27,23 +29,40 @@ def search_replies(
     author_id: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
-    reply_manager: Optional[ReplyManager] = None
+    reply_manager: Optional[ReplyManager] = None,
+    fuzzy: bool = False
 ) -> List[Dict[str, Any]]:
-    """リプライを検索する"""
+    """リプライを検索する（fuzzy指定時はキーワードに似ている順）"""
     if not reply_manager:
         return []
     
     try:
-        # 全リプライを取得
-        all_replies = reply_manager.get_all_replies()
+        # 同じ条件の検索がデータの世代が変わらないうちに繰り返された場合は走査しない
+        cache_key = (
+            normalize_text(keyword) if keyword else None,
+            author_id or None,
+            date_from.isoformat() if date_from else None,
+            date_to.isoformat() if date_to else None,
+            bool(fuzzy and keyword)
+        )
+        generation = reply_manager.get_data_generation()
+        cached_ids = reply_manager.query_cache.get(cache_key, generation)
+        if cached_ids is not None:
+            return reply_manager.get_replies_by_ids(cached_ids)
+        
+        if fuzzy and keyword:
+            filtered_replies = _fuzzy_search_replies(keyword, author_id, date_from, date_to, reply_manager)
+            reply_manager.query_cache.put(cache_key, generation, [reply['id'] for reply in filtered_replies])
+            return filtered_replies
         
-        # 検索条件でフィルタリング
+        # 作成日時インデックスから新しい順に取り出す（期間はインデックス側で絞り込む）
+        # キーワードは投稿の検索と同じく、全角・半角や大文字・小文字の違いを無視して比べる
+        normalized_keyword = normalize_text(keyword) if keyword else None
         filtered_replies = []
-        for reply in all_replies:
+        for reply in reply_manager.iter_replies_by_time(date_from, date_to):
             # キーワード検索
-            if keyword:
-                content = (reply.get('content') or '').lower()
-                if keyword.lower() not in content:
+            if normalized_keyword:
+                if normalized_keyword not in normalize_text(reply.get('content')):
                     continue
             
             # 著者検索
@@ -51,27 +70,46 @@ def search_replies(
                 if reply.get('user_id') != author_id:
                     continue
             
-            # 日付検索
-            if date_from or date_to:
-                try:
-                    reply_date = datetime.fromisoformat(reply.get('created_at', '').replace('Z', '+00:00'))
-                    if date_from and reply_date < date_from:
-                        continue
-                    if date_to and reply_date > date_to:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-            
             filtered_replies.append(reply)
+            if len(filtered_replies) >= MAX_SEARCH_RESULTS:
+                break
         
-        # 作成日でソート（新しい順）
-        filtered_replies.sort(
-            key=lambda x: datetime.fromisoformat(x.get('created_at', '').replace('Z', '+00:00')),
-            reverse=True
-        )
-        
-        return filtered_replies[:MAX_SEARCH_RESULTS]
+        reply_manager.query_cache.put(cache_key, generation, [reply['id'] for reply in filtered_replies])
+        return filtered_replies
         
     except Exception as e:
         logger.error(f"リプライ検索中にエラー: {e}")
         return []
+
+def _fuzzy_search_replies(
+    keyword: str,
+    author_id: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    reply_manager: ReplyManager
+) -> List[Dict[str, Any]]:
+    """キーワードに似ているリプライを一致率の高い順に検索（候補はn-gramインデックスから求める）"""
+    ranked_ids = [reply_id for reply_id, _ in reply_manager.fuzzy_search_reply_ids(keyword)]
+    epoch_from = to_epoch(date_from) if date_from else None
+    epoch_to = to_epoch(date_to) if date_to else None
+    
+    filtered_replies = []
+    # 上限に達するまで一致率の高い順に少しずつ読み込む
+    for start in range(0, len(ranked_ids), MAX_SEARCH_RESULTS):
+        for reply in reply_manager.get_replies_by_ids(ranked_ids[start:start + MAX_SEARCH_RESULTS]):
+            if author_id and reply.get('user_id') != author_id:
+                continue
+            
+            created = to_epoch(reply.get('created_at'))
+            if (epoch_from is not None or epoch_to is not None) and created is None:
+                continue
+            if epoch_from is not None and created < epoch_from:
+                continue
+            if epoch_to is not None and created > epoch_to:
+                continue
+            
+            filtered_replies.append(reply)
+            if len(filtered_replies) >= MAX_SEARCH_RESULTS:
+                return filtered_replies
+    
+    return filtered_replies
@@ -36,6 +36,16 @@ class SearchTypeView(ui.View):
                     label="🔍 詳細検索",
                     description="詳細な条件で検索します",
                     emoji="🔍"
+                ),
+                discord.SelectOption(
+                    label="🔤 あいまい検索（投稿）",
+                    description="誤字や表記揺れがあっても似ている投稿を探します",
+                    emoji="🔤"
+                ),
+                discord.SelectOption(
+                    label="🔤 あいまい検索（リプライ）",
+                    description="誤字や表記揺れがあっても似ているリプライを探します",
+                    emoji="🔤"
                 )
             ]
         )
@@ -55,13 +65,21 @@ class SearchTypeView(ui.View):
             modal.title = "📝 投稿検索"
             await interaction.response.send_modal(modal)
         elif selected == "💬 リプライ検索":
-            modal = SearchModal(self.cog)
+            modal = SearchModal(self.cog, search_type="リプライ")
             modal.title = "💬 リプライ検索"
             await interaction.response.send_modal(modal)
         elif selected == "🔍 詳細検索":
             modal = SearchModal(self.cog)
             modal.title = "🔍 詳細検索"
             await interaction.response.send_modal(modal)
+        elif selected == "🔤 あいまい検索（投稿）":
+            modal = SearchModal(self.cog, fuzzy=True)
+            modal.title = "🔤 あいまい検索（投稿）"
+            await interaction.response.send_modal(modal)
+        elif selected == "🔤 あいまい検索（リプライ）":
+            modal = SearchModal(self.cog, search_type="リプライ", fuzzy=True)
+            modal.title = "🔤 あいまい検索（リプライ）"
+            await interaction.response.send_modal(modal)
 
 # SearchTypeViewをエクスポート
 __all__ = ['SearchTypeView']
@@ -3,7 +3,7 @@
 """
 
 # 検索機能を統合インポート
-from .search_posts import search_posts
+from .search_posts import search_posts, iter_search_posts
 from .search_replies import search_replies
 from .search_embed import create_search_embed
 from .search_validation import parse_date_string, validate_search_params
@@ -11,6 +11,7 @@ from .search_validation import parse_date_string, validate_search_params
 # すべての検索機能をエクスポート
 __all__ = [
     'search_posts',
+    'iter_search_posts',
     'search_replies', 
     'create_search_embed',
     'parse_date_string',
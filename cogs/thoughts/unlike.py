@@ -14,6 +14,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from managers.like_manager import LikeManager
 from managers.post_manager import PostManager
+from managers.registry import get_managers
 from config import get_channel_id, extract_channel_id
 
 logger = logging.getLogger(__name__)
@@ -164,8 +165,9 @@ class Unlike(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.like_manager = LikeManager()
-        self.post_manager = PostManager()
+        managers = get_managers(bot)
+        self.like_manager = managers.like_manager
+        self.post_manager = managers.post_manager
         logger.info("Unlike cog が初期化されました")
     
     @app_commands.command(name='unlike', description='❌ いいねを削除する')
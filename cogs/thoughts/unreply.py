@@ -13,6 +13,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from managers.reply_manager import ReplyManager
+from managers.registry import get_managers
 from config import get_channel_id, extract_channel_id
 
 logger = logging.getLogger(__name__)
@@ -153,7 +154,8 @@ class Unreply(commands.Cog):
     
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.reply_manager = ReplyManager()
+        managers = get_managers(bot)
+        self.reply_manager = managers.reply_manager
         logger.info("Unreply cog が初期化されました")
     
     @app_commands.command(name='unreply', description='🗑️ リプライを削除する')
@@ -0,0 +1,146 @@
+import json
+import os
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from managers.serializer import dumps_line, loads_line
+
+logger = logging.getLogger(__name__)
+
+# バッファがこの件数に達したら書き出す
+MAX_BUFFERED_ENTRIES = 100
+# 最後の書き出しからこの秒数が経過したら書き出す
+FLUSH_INTERVAL_SECONDS = 5.0
+
+class AccessLogWriter:
+    """アクセスログの書き込み管理（追記専用のJSONL形式）"""
+
+    def __init__(self, log_dir: str, max_buffer: int = MAX_BUFFERED_ENTRIES,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.log_dir = log_dir
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.buffer: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        os.makedirs(log_dir, exist_ok=True)
+
+        # 一定時間ごとにバッファを書き出すバックグラウンドスレッド
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="access-log-flusher", daemon=True)
+        self._flush_thread.start()
+
+    def log(self, user_id: str, post_id: Optional[int], action: str, is_private: bool = False, **extra: Any) -> None:
+        """アクセスログをバッファに追加"""
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "post_id": post_id,
+            "action": action,
+            "is_private": is_private
+        }
+        entry.update(extra)
+
+        with self.lock:
+            self.buffer.append(entry)
+            should_flush = (len(self.buffer) >= self.max_buffer or
+                            time.monotonic() - self.last_flush >= self.flush_interval)
+
+        if should_flush:
+            self.flush()
+
+    def log_bulk_read(self, user_id: str, post_count: int, private_count: int = 0) -> None:
+        """全件読み込みを1件の要約エントリとして記録"""
+        self.log(user_id, None, "bulk_read", private_count > 0,
+                 post_count=post_count, private_count=private_count)
+
+    def flush(self) -> None:
+        """バッファを日付ごとのJSONLファイルに追記"""
+        with self.lock:
+            entries, self.buffer = self.buffer, []
+            self.last_flush = time.monotonic()
+
+            if not entries:
+                return
+
+            # 日付ごとにまとめて1回のopenで書き込む
+            lines_by_file: Dict[str, List[str]] = {}
+            for entry in entries:
+                day = entry['timestamp'][:10].replace('-', '')
+                log_file = os.path.join(self.log_dir, f"access_{day}.jsonl")
+                lines_by_file.setdefault(log_file, []).append(dumps_line(entry))
+
+            for log_file, lines in lines_by_file.items():
+                try:
+                    with open(log_file, 'a', encoding='utf-8') as f:
+                        f.write('\n'.join(lines) + '\n')
+                except OSError as e:
+                    logger.error(f"アクセスログの書き込みに失敗しました: {log_file} - {e}")
+
+    def _flush_loop(self) -> None:
+        """一定間隔でバッファを書き出す"""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """バックグラウンドスレッドを停止して残りを書き出す"""
+        self._stop_event.set()
+        self.flush()
+
+def read_access_log(log_file: str) -> List[Dict[str, Any]]:
+    """アクセスログを読み込む（JSONLと旧形式のJSON配列の両方に対応）"""
+    if not os.path.exists(log_file):
+        return []
+
+    with open(log_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    # 旧形式: ファイル全体が1つのJSON配列
+    if text.lstrip().startswith('['):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            logger.warning(f"旧形式のアクセスログを解析できません: {log_file}")
+            return []
+
+    entries = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append(loads_line(line))
+        except ValueError:
+            # 書き込み途中でクラッシュした最終行などは読み飛ばす
+            continue
+    return entries
+
+def read_access_logs(log_dir: str, day: str) -> List[Dict[str, Any]]:
+    """指定日（YYYYMMDD）のアクセスログを新旧両方のファイルから読み込む"""
+    entries = []
+    for extension in ('json', 'jsonl'):
+        entries.extend(read_access_log(os.path.join(log_dir, f"access_{day}.{extension}")))
+    return entries
+
+_access_logs: Dict[str, AccessLogWriter] = {}
+_access_logs_lock = threading.Lock()
+
+def get_access_log(log_dir: str) -> AccessLogWriter:
+    """ディレクトリごとに共有されるAccessLogWriterを取得"""
+    key = os.path.abspath(log_dir)
+    with _access_logs_lock:
+        if key not in _access_logs:
+            _access_logs[key] = AccessLogWriter(log_dir)
+        return _access_logs[key]
+
+def flush_access_logs() -> None:
+    """全てのアクセスログのバッファを書き出す"""
+    with _access_logs_lock:
+        writers = list(_access_logs.values())
+    for writer in writers:
+        writer.flush()
+
+atexit.register(flush_access_logs)
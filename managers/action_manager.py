@@ -1,9 +1,10 @@
-import json
 import os
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from managers.record_store import get_record_store
+
 logger = logging.getLogger(__name__)
 
 class ActionManager:
@@ -13,6 +14,9 @@ class ActionManager:
         self.base_dir = base_dir
         self.actions_dir = os.path.join(base_dir, "actions")
         os.makedirs(self.actions_dir, exist_ok=True)
+        
+        # レコードの読み書き（全マネージャーで共有）
+        self.record_store = get_record_store(base_dir)
     
     def save_action_record(self, action_type: str, user_id: str, target_id: str, 
                           action_data: Dict[str, Any] = None) -> None:
@@ -27,7 +31,6 @@ class ActionManager:
         
         action_filename = os.path.join(self.actions_dir, f"action_{action_type}_{user_id}_{target_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
         
-        with open(action_filename, 'w', encoding='utf-8') as f:
-            json.dump(action_record, f, ensure_ascii=False, indent=2)
+        self.record_store.write(action_filename, action_record)
         
         logger.info(f"アクション記録完了: {action_type} by user {user_id} on target {target_id}")
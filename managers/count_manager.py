@@ -0,0 +1,173 @@
+import os
+import atexit
+import logging
+import threading
+from typing import Dict, Any, List, Callable, Iterable
+
+from managers.serializer import dump_file, load_file
+
+logger = logging.getLogger(__name__)
+
+COUNT_KINDS = ('likes', 'replies')
+COUNTS_VERSION = 1
+# 件数の変更をまとめてファイルへ書き出すまでの時間（秒）
+COUNTS_FLUSH_DELAY_SECONDS = 1.0
+
+class CountManager:
+    """投稿ごとのいいね数・リプライ数の管理（非正規化カウンター）
+    
+    増減はメモリ上で行い、ファイルへは一定時間ごとにまとめて書き出す。
+    書き出す前に終了した場合は目印のファイルが残り、次回の起動時に実データから再構築する。
+    """
+    
+    def __init__(self, base_dir: str = "data", flush_delay: float = COUNTS_FLUSH_DELAY_SECONDS):
+        self.base_dir = base_dir
+        self.counts_file = os.path.join(base_dir, ".counts.json")
+        self.dirty_file = os.path.join(base_dir, ".counts.dirty")
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()
+        os.makedirs(base_dir, exist_ok=True)
+        
+        # kind -> {post_id: 件数}
+        self.counts: Dict[str, Dict[int, int]] = {kind: {} for kind in COUNT_KINDS}
+        # kind -> 全件数（ずれの検出に使う）
+        self.totals: Dict[str, int] = {}
+        # ファイルに書き出していない変更があるか
+        self.dirty = False
+        self._flush_timer = None
+        self._load()
+    
+    def _load(self) -> None:
+        """カウンターファイルを読み込む"""
+        if not os.path.exists(self.counts_file):
+            return
+        if os.path.exists(self.dirty_file):
+            logger.info("前回の終了時に書き出されていない変更があったためカウンターを再構築します")
+            return
+        
+        try:
+            data = load_file(self.counts_file)
+            
+            if data.get('version') != COUNTS_VERSION:
+                logger.info("カウンターファイルのバージョンが異なるため再構築します")
+                return
+            
+            for kind in COUNT_KINDS:
+                self.counts[kind] = {int(post_id): int(count) for post_id, count in data['counts'][kind].items()}
+            self.totals = {kind: int(total) for kind, total in data['totals'].items()}
+        except (KeyError, ValueError, AttributeError, OSError) as e:
+            logger.warning(f"カウンターファイルを読み込めないため再構築します: {e}")
+            self.counts = {kind: {} for kind in COUNT_KINDS}
+            self.totals = {}
+    
+    def _save(self) -> None:
+        """カウンターを保存（一時ファイルに書いてから置き換える）"""
+        data = {
+            'version': COUNTS_VERSION,
+            'totals': self.totals,
+            'counts': {kind: {str(post_id): count for post_id, count in counts.items()}
+                       for kind, counts in self.counts.items()}
+        }
+        
+        tmp_file = f"{self.counts_file}.tmp"
+        dump_file(tmp_file, data)
+        os.replace(tmp_file, self.counts_file)
+        self.dirty = False
+        if os.path.exists(self.dirty_file):
+            os.remove(self.dirty_file)
+    
+    def _mark_dirty(self) -> None:
+        """変更があったことを記録し、少し後にまとめて書き出す（ロックは呼び出し側で取得）"""
+        if not self.dirty:
+            self.dirty = True
+            # 書き出す前に終了した場合に次回の起動で再構築させるための目印（空ファイル）
+            open(self.dirty_file, 'w').close()
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> bool:
+        """書き出していない変更があればファイルに保存"""
+        with self.lock:
+            self._flush_timer = None
+            if not self.dirty:
+                return False
+            self._save()
+            return True
+    
+    def ensure_consistent(self, kind: str, total: int, load_counts: Callable[[], Dict[int, int]],
+                          force: bool = False) -> None:
+        """保存済みの件数が実データと一致しなければ再構築
+        
+        Args:
+            kind: "likes" または "replies"
+            total: 実データの全件数
+            load_counts: 実データから {post_id: 件数} を集計する関数（再構築時のみ呼ばれる）
+            force: 全件数が一致していても再構築する（外部でデータが変更された場合）
+        """
+        with self.lock:
+            if not force and self.totals.get(kind) == total:
+                return
+            
+            logger.info(f"カウンターを再構築します: {kind} (保存済み={self.totals.get(kind)}, 実データ={total})")
+            self.counts[kind] = {post_id: count for post_id, count in load_counts().items() if count > 0}
+            self.totals[kind] = total
+            self._save()
+    
+    def increment(self, post_id: int, kind: str, delta: int = 1) -> None:
+        """投稿の件数を増減"""
+        with self.lock:
+            counts = self.counts[kind]
+            new_count = counts.get(post_id, 0) + delta
+            if new_count > 0:
+                counts[post_id] = new_count
+            else:
+                counts.pop(post_id, None)
+            self.totals[kind] = max(0, self.totals.get(kind, 0) + delta)
+            self._mark_dirty()
+    
+    def get_counts(self, post_id: int) -> Dict[str, int]:
+        """投稿のいいね数・リプライ数を取得"""
+        with self.lock:
+            return {kind: self.counts[kind].get(post_id, 0) for kind in COUNT_KINDS}
+    
+    def get_counts_bulk(self, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """複数投稿のいいね数・リプライ数をまとめて取得"""
+        with self.lock:
+            return {post_id: {kind: self.counts[kind].get(post_id, 0) for kind in COUNT_KINDS}
+                    for post_id in post_ids}
+    
+    def get_totals(self) -> Dict[str, int]:
+        """全体のいいね数・リプライ数を取得"""
+        with self.lock:
+            return {kind: self.totals.get(kind, 0) for kind in COUNT_KINDS}
+
+_count_managers: Dict[str, CountManager] = {}
+_count_managers_lock = threading.Lock()
+
+def get_count_manager(base_dir: str = "data") -> CountManager:
+    """base_dirごとに共有されるCountManagerを取得"""
+    key = os.path.abspath(base_dir)
+    with _count_managers_lock:
+        if key not in _count_managers:
+            _count_managers[key] = CountManager(base_dir)
+        return _count_managers[key]
+
+def flush_count_managers() -> None:
+    """全てのCountManagerの書き出していない変更を保存"""
+    with _count_managers_lock:
+        managers = list(_count_managers.values())
+    for manager in managers:
+        manager.flush()
+
+atexit.register(flush_count_managers)
+
+def attach_counts(items: List[Dict[str, Any]], count_manager: CountManager) -> List[Dict[str, Any]]:
+    """投稿データのリストにlike_count/reply_countを付与"""
+    counts = count_manager.get_counts_bulk(item['id'] for item in items if 'id' in item)
+    for item in items:
+        item_counts = counts.get(item.get('id'), {})
+        item['like_count'] = item_counts.get('likes', 0)
+        item['reply_count'] = item_counts.get('replies', 0)
+    return items
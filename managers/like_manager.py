@@ -1,9 +1,15 @@
-import json
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from managers.sequence_manager import get_sequence_manager
+from managers.memory_utils import estimate_size
+from managers.count_manager import get_count_manager
+from managers.record_store import get_record_store
+
 logger = logging.getLogger(__name__)
 
 class LikeManager:
@@ -13,13 +19,131 @@ class LikeManager:
         self.base_dir = base_dir
         self.likes_dir = os.path.join(base_dir, "likes")
         os.makedirs(self.likes_dir, exist_ok=True)
+        
+        # ID採番（全マネージャーで共有）
+        self.sequence_manager = get_sequence_manager(base_dir)
+        
+        # レコードの読み書き（全マネージャーで共有）
+        self.record_store = get_record_store(base_dir)
+        
+        # メモリ上のインデックス
+        self.index_lock = threading.RLock()
+        self._likes: Dict[int, Dict[str, Any]] = {}
+        self._likes_by_post: Dict[int, List[int]] = {}
+        self._likes_by_user: Dict[str, List[int]] = {}
+        self._likes_by_post_user: Dict[Tuple[int, str], List[int]] = {}
+        self.index_stats: Dict[str, Any] = {}
+        # git pullなど外部での変更を検知するためのディレクトリの世代
+        self._index_generation = self.record_store.directory_generation(self.likes_dir)
+        self._build_indexes()
+        
+        # 投稿ごとの件数カウンター（全マネージャーで共有）
+        self.count_manager = get_count_manager(base_dir)
+        self._sync_counts()
+    
+    def _build_indexes(self) -> None:
+        """いいねファイルを一度だけ読み込んでインデックスを構築"""
+        started = time.perf_counter()
+        
+        with self.index_lock:
+            self._likes.clear()
+            self._likes_by_post.clear()
+            self._likes_by_user.clear()
+            self._likes_by_post_user.clear()
+            
+            # スナップショットから復元済みのレコードはファイルを読まずに使われる
+            for filename, like_data in self.record_store.read_all(self.likes_dir):
+                if not filename.startswith('like_'):
+                    continue
+                try:
+                    self._index_like(like_data)
+                except (KeyError, TypeError):
+                    continue
+            
+            self.index_stats = {
+                'likes': len(self._likes),
+                'build_time_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        
+        logger.info(
+            f"いいねインデックスを構築しました: {self.index_stats['likes']}件, "
+            f"{self.index_stats['build_time_ms']}ms"
+        )
+    
+    def _index_like(self, like_data: Dict[str, Any]) -> None:
+        """いいねをインデックスに追加"""
+        like_id = int(like_data['id'])
+        if like_id in self._likes:
+            self._unindex_like(like_id)
+        
+        post_id = like_data.get('post_id')
+        user_id = like_data.get('user_id')
+        self._likes[like_id] = like_data
+        
+        for index, key in ((self._likes_by_post, post_id),
+                           (self._likes_by_user, user_id),
+                           (self._likes_by_post_user, (post_id, user_id))):
+            ids = index.setdefault(key, [])
+            ids.append(like_id)
+            ids.sort()
+    
+    def _unindex_like(self, like_id: int) -> None:
+        """いいねをインデックスから削除"""
+        like_data = self._likes.pop(like_id, None)
+        if not like_data:
+            return
+        
+        post_id = like_data.get('post_id')
+        user_id = like_data.get('user_id')
+        for index, key in ((self._likes_by_post, post_id),
+                           (self._likes_by_user, user_id),
+                           (self._likes_by_post_user, (post_id, user_id))):
+            ids = index.get(key)
+            if ids and like_id in ids:
+                ids.remove(like_id)
+                if not ids:
+                    del index[key]
+    
+    def _refresh_if_changed(self) -> None:
+        """いいねファイルが外部で変更されていればインデックスとカウンターを作り直す"""
+        generation = self.record_store.directory_generation(self.likes_dir)
+        if generation == self._index_generation:
+            return
+        
+        with self.index_lock:
+            self._index_generation = generation
+            self._build_indexes()
+            self._sync_counts(force=True)
+    
+    def _sync_counts(self, force: bool = False) -> None:
+        """投稿ごとのいいね数カウンターを実データと突き合わせる"""
+        with self.index_lock:
+            self.count_manager.ensure_consistent(
+                'likes', len(self._likes),
+                lambda: {post_id: len(ids) for post_id, ids in self._likes_by_post.items()},
+                force=force
+            )
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """インデックスの件数・構築時間・メモリ使用量を取得"""
+        with self.index_lock:
+            stats = dict(self.index_stats)
+            stats['likes'] = len(self._likes)
+            # メモリ量の推定は全件をたどるため起動時ではなく要求された時に計算する
+            stats['memory_bytes'] = estimate_size([self._likes, self._likes_by_post,
+                                                   self._likes_by_user, self._likes_by_post_user])
+            return stats
     
     def get_next_like_id(self) -> int:
         """次のいいねIDを取得"""
-        existing_likes = [f for f in os.listdir(self.likes_dir) if f.endswith('.json')]
-        if not existing_likes:
-            return 1
-        
+        return self.sequence_manager.next_id(
+            'likes', self._scan_max_like_id,
+            lambda like_id: self.record_store.exists(os.path.join(self.likes_dir, f"like_{like_id}.json"))
+        )
+    
+    def _scan_max_like_id(self) -> int:
+        """既存ファイルから最大のいいねIDを取得（採番の初期化時のみ使用）"""
+        existing_likes = self.record_store.list_names(self.likes_dir)
         max_id = 0
         for filename in existing_likes:
             try:
@@ -28,7 +152,7 @@ class LikeManager:
             except ValueError:
                 continue
         
-        return max_id + 1
+        return max_id
     
     def save_like(self, post_id: int, user_id: str, display_name: str) -> int:
         """いいねを保存"""
@@ -43,60 +167,39 @@ class LikeManager:
         }
         
         filename = os.path.join(self.likes_dir, f"like_{like_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(like_data, f, ensure_ascii=False, indent=2)
+        self.record_store.write(filename, like_data)
+        
+        with self.index_lock:
+            self._index_like(like_data)
+            self.count_manager.increment(post_id, 'likes')
         
         logger.info(f"いいねを保存しました: like_id={like_id}, post_id={post_id}, user_id={user_id}")
         return like_id
     
+    def _get_likes_by_ids(self, like_ids: List[int]) -> List[Dict[str, Any]]:
+        """IDのリストからいいねのコピーを取得（呼び出し側の変更がインデックスに影響しないように）"""
+        return [dict(self._likes[like_id]) for like_id in like_ids]
+    
     def get_likes(self, post_id: int) -> List[Dict[str, Any]]:
         """投稿のいいねを取得"""
-        likes = []
-        
-        for filename in sorted(os.listdir(self.likes_dir)):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like = json.load(f)
-                    
-                    if like.get('post_id') == post_id:
-                        likes.append(like)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        
-        return likes
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_likes_by_ids(self._likes_by_post.get(post_id, []))
     
     def get_likes_by_user(self, user_id: str) -> List[Dict[str, Any]]:
         """ユーザーのいいねを取得"""
-        user_likes = []
-        
-        for filename in sorted(os.listdir(self.likes_dir)):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like_data = json.load(f)
-                    
-                    if like_data.get('user_id') == user_id:
-                        user_likes.append(like_data)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        
-        return user_likes
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_likes_by_ids(self._likes_by_user.get(user_id, []))
     
     def get_like_by_user_and_post(self, post_id: int, user_id: str) -> Optional[Dict[str, Any]]:
         """ユーザーといいねされた投稿IDからいいねデータを取得"""
-        for filename in os.listdir(self.likes_dir):
-            if filename.startswith('like_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.likes_dir, filename), 'r', encoding='utf-8') as f:
-                        like_data = json.load(f)
-                    
-                    if (like_data.get('post_id') == post_id and 
-                        like_data.get('user_id') == user_id):
-                        return like_data
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        return None
+        self._refresh_if_changed()
+        with self.index_lock:
+            like_ids = self._likes_by_post_user.get((post_id, user_id))
+            if not like_ids:
+                return None
+            return dict(self._likes[like_ids[0]])
     
     def delete_like(self, post_id: int, user_id: str) -> bool:
         """いいねを削除"""
@@ -105,28 +208,31 @@ class LikeManager:
             return False
         
         filename = os.path.join(self.likes_dir, f"like_{like_data['id']}.json")
-        try:
-            os.remove(filename)
-            return True
-        except FileNotFoundError:
+        if not self.record_store.delete(filename):
             return False
+        
+        with self.index_lock:
+            self._unindex_like(like_data['id'])
+            self.count_manager.increment(like_data.get('post_id'), 'likes', -1)
+        return True
     
     def update_like_message_id(self, like_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
         """いいねファイルにメッセージIDを更新"""
         filename = os.path.join(self.likes_dir, f"like_{like_id}.json")
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                like_data = json.load(f)
-            
-            like_data['message_id'] = message_id
-            like_data['channel_id'] = channel_id
-            if forwarded_message_id:
-                like_data['forwarded_message_id'] = forwarded_message_id
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(like_data, f, ensure_ascii=False, indent=2)
-                
-            logger.info(f"いいねメッセージIDを更新しました: like_id={like_id}")
-        except (json.JSONDecodeError, FileNotFoundError):
+        like_data = self.record_store.read(filename)
+        if not like_data:
             logger.warning(f"いいねメッセージID更新失敗: like_id={like_id}")
+            return
+        
+        like_data['message_id'] = message_id
+        like_data['channel_id'] = channel_id
+        if forwarded_message_id:
+            like_data['forwarded_message_id'] = forwarded_message_id
+        
+        self.record_store.write(filename, like_data)
+        
+        with self.index_lock:
+            self._index_like(like_data)
+        
+        logger.info(f"いいねメッセージIDを更新しました: like_id={like_id}")
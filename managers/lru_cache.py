@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable
+
+from managers.memory_utils import estimate_size
+
+class LRUCache:
+    """件数とメモリ量の上限付きLRUキャッシュ（ヒット・ミス数を記録）"""
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 4 * 1024 * 1024,
+                 sizeof: Callable[[Any], int] = estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.lock = threading.Lock()
+        # key -> (値, 推定サイズ)
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """値を取得（見つかった場合は最近使ったものとして扱う）"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """値を追加し、上限を超えた分を古い順に追い出す"""
+        size = self.sizeof(value)
+        with self.lock:
+            # 単体で上限を超える値はキャッシュしない
+            if size > self.max_bytes:
+                self._remove(key)
+                return
+            
+            self._remove(key)
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            
+            while self.entries and (len(self.entries) > self.max_entries or self.current_bytes > self.max_bytes):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+    
+    def _remove(self, key: Hashable) -> bool:
+        """キーを削除（ロックは呼び出し側で取得）"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= entry[1]
+        return True
+    
+    def invalidate(self, key: Hashable) -> bool:
+        """キーを無効化"""
+        with self.lock:
+            return self._remove(key)
+    
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """条件に一致するキーをすべて無効化"""
+        with self.lock:
+            keys = [key for key in self.entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def prune(self, predicate: Callable[[Any], bool]) -> int:
+        """値が条件に一致するエントリをすべて削除（期限切れの掃除用）"""
+        with self.lock:
+            keys = [key for key, (value, _) in self.entries.items() if predicate(value)]
+            for key in keys:
+                self._remove(key)
+                self.evictions += 1
+            return len(keys)
+    
+    def clear(self) -> None:
+        """全件を削除"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """件数・メモリ量・ヒット率を取得"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,23 @@
+import sys
+from typing import Any
+
+def estimate_size(obj: Any) -> int:
+    """オブジェクトが使用するおおよそのメモリ量（バイト）を再帰的に計算"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    
+    return total
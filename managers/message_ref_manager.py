@@ -1,9 +1,10 @@
-import json
 import os
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from managers.record_store import get_record_store
+
 logger = logging.getLogger(__name__)
 
 class MessageRefManager:
@@ -13,6 +14,9 @@ class MessageRefManager:
         self.base_dir = base_dir
         self.message_refs_dir = os.path.join(base_dir, "message_refs")
         os.makedirs(self.message_refs_dir, exist_ok=True)
+        
+        # レコードの読み書き（全マネージャーで共有）
+        self.record_store = get_record_store(base_dir)
     
     def save_message_ref(self, post_id: int, message_id: str, channel_id: str, user_id: str) -> None:
         """メッセージ参照を保存"""
@@ -26,8 +30,7 @@ class MessageRefManager:
         
         message_ref_file = os.path.join(self.message_refs_dir, f'message_ref_{post_id}.json')
         
-        with open(message_ref_file, 'w', encoding='utf-8') as f:
-            json.dump(message_ref_data, f, ensure_ascii=False, indent=2)
+        self.record_store.write(message_ref_file, message_ref_data)
         
         logger.info(f"メッセージ参照を保存しました: 投稿ID={post_id}")
     
@@ -35,21 +38,10 @@ class MessageRefManager:
         """メッセージ参照を取得"""
         message_ref_file = os.path.join(self.message_refs_dir, f'message_ref_{post_id}.json')
         
-        if not os.path.exists(message_ref_file):
-            return None
-        
-        try:
-            with open(message_ref_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return None
+        return self.record_store.read(message_ref_file)
     
     def delete_message_ref(self, post_id: int) -> bool:
         """メッセージ参照を削除"""
         message_ref_file = os.path.join(self.message_refs_dir, f'message_ref_{post_id}.json')
         
-        try:
-            os.remove(message_ref_file)
-            return True
-        except FileNotFoundError:
-            return False
+        return self.record_store.delete(message_ref_file)
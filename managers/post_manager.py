@@ -1,16 +1,33 @@
-import json
 import os
 import logging
 import hashlib
 import base64
-from typing import Dict, Any, List, Optional
+import bisect
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterator, Iterable, Set, Tuple
 from datetime import datetime
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from managers.sequence_manager import get_sequence_manager
+from managers.access_log import get_access_log
+from managers.record_store import get_record_store
+from managers.lru_cache import LRUCache
+from managers.text_index import NgramIndex, normalize_text
+from managers.time_index import TimeIndex
+from managers.query_cache import QueryCache
+from managers.post_query import PostQuery, ORDER_ID, ORDER_NEWEST, VISIBILITY_PUBLIC, VISIBILITY_PRIVATE
+
 logger = logging.getLogger(__name__)
 
+# 復号済みコンテンツのキャッシュ上限
+DECRYPT_CACHE_MAX_ENTRIES = 2048
+DECRYPT_CACHE_MAX_BYTES = 4 * 1024 * 1024
+# query_postsで一度に読み込む投稿数（上限に達したら残りは読まない）
+QUERY_BATCH_SIZE = 32
+
 class PostManager:
     """投稿機能の管理"""
     
@@ -29,6 +46,46 @@ class PostManager:
         # 暗号化キーを生成
         self.encryption_key = self._get_or_create_encryption_key()
         self.cipher = Fernet(self.encryption_key)
+        
+        # 復号済みコンテンツのキャッシュ（キーは (post_id, updated_at)）
+        self.decrypt_cache = LRUCache(DECRYPT_CACHE_MAX_ENTRIES, DECRYPT_CACHE_MAX_BYTES)
+        
+        # ID採番（全マネージャーで共有）
+        self.sequence_manager = get_sequence_manager(base_dir)
+        
+        # アクセスログ（JSONLへのバッファ付き追記）
+        self.access_log = get_access_log(self.access_log_dir)
+        
+        # レコードの読み書き（全マネージャーで共有）
+        self.record_store = get_record_store(base_dir)
+        
+        # 投稿ID -> (ファイルパス, 非公開かどうか) のインデックス
+        self.index_lock = threading.RLock()
+        self._post_locations: Dict[int, Tuple[str, bool]] = {}
+        # git pullなど外部での変更を検知するための投稿ディレクトリの世代
+        self._locations_generation = self._posts_generation()
+        self._build_post_locations()
+        
+        # 検索用インデックス（初回の検索時に構築し、以降は保存・更新・削除で差分更新）
+        self.text_index = NgramIndex()
+        # 正規化したカテゴリー -> 投稿ID（昇順）、投稿ID -> (正規化したカテゴリー, 表記)
+        self._posts_by_category: Dict[str, List[int]] = {}
+        self._post_categories: Dict[int, Tuple[str, str]] = {}
+        # 正規化したカテゴリー -> 表記ごとの件数（最も多い表記を表示に使う）
+        self._category_labels: Dict[str, Dict[str, int]] = {}
+        # 作成日時順のインデックス（非公開投稿も含む）
+        self.created_index = TimeIndex()
+        # 投稿者 -> 投稿ID（昇順、非公開投稿も含む）、投稿ID -> 投稿者
+        self._posts_by_user: Dict[str, List[int]] = {}
+        self._post_authors: Dict[int, str] = {}
+        # 非公開・匿名の投稿ID（ファイルを読まずに公開範囲・匿名の条件を判定する）
+        self._private_posts: Set[int] = set()
+        self._anonymous_posts: Set[int] = set()
+        self._search_indexes_ready = False
+        
+        # 投稿の追加・更新・削除のたびに進む世代と、それをキーに含む検索結果のキャッシュ
+        self._data_generation = 0
+        self.query_cache = QueryCache()
     
     def _get_or_create_encryption_key(self) -> bytes:
         """暗号化キーを取得または生成"""
@@ -63,62 +120,119 @@ class PostManager:
         """コンテンツを復号"""
         return self.cipher.decrypt(encrypted_content.encode()).decode()
     
+    def _decrypt_post_content(self, post_data: Dict[str, Any]) -> str:
+        """非公開投稿のコンテンツを復号（同じ版の投稿はキャッシュから返す）"""
+        cache_key = (post_data.get('id'), post_data.get('updated_at'))
+        content = self.decrypt_cache.get(cache_key)
+        if content is None:
+            content = self._decrypt_content(post_data['content'])
+            self.decrypt_cache.put(cache_key, content)
+        return content
+    
+    def _invalidate_decrypted(self, post_id) -> None:
+        """投稿の復号済みコンテンツをキャッシュから削除"""
+        try:
+            post_id = int(post_id)
+        except (TypeError, ValueError):
+            return
+        self.decrypt_cache.invalidate_where(lambda key: key[0] == post_id)
+    
+    def get_decrypt_cache_stats(self) -> Dict[str, Any]:
+        """復号キャッシュの件数・メモリ量・ヒット率を取得"""
+        return self.decrypt_cache.get_stats()
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """検索結果キャッシュの件数・メモリ量・ヒット率を取得"""
+        return self.query_cache.get_stats()
+    
     def _log_access(self, user_id: str, post_id: int, action: str, is_private: bool = False):
         """アクセスログを記録"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "user_id": user_id,
-            "post_id": post_id,
-            "action": action,
-            "is_private": is_private
-        }
-        
-        log_file = os.path.join(self.access_log_dir, f"access_{datetime.now().strftime('%Y%m%d')}.json")
-        
-        # 既存のログを読み込む
-        logs = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-            except:
-                logs = []
-        
-        # 新しいログを追加
-        logs.append(log_entry)
-        
-        # ログを保存
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
+        self.access_log.log(user_id, post_id, action, is_private)
     
     def get_next_post_id(self) -> int:
         """次の投稿IDを取得"""
-        # 公開・非公開両方のディレクトリをチェック
-        all_posts = []
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            if os.path.exists(directory):
-                all_posts.extend([f for f in os.listdir(directory) if f.endswith('.json')])
+        return self.sequence_manager.next_id('posts', self._scan_max_post_id, self._post_id_exists)
+    
+    def _post_id_exists(self, post_id: int) -> bool:
+        """投稿IDが既に使われているか確認"""
+        return self._locate_post(post_id) is not None
+    
+    def _scan_max_post_id(self) -> int:
+        """既存の投稿から最大の投稿IDを取得（採番の初期化時のみ使用）"""
+        with self.index_lock:
+            return max(self._post_locations, default=0)
+    
+    def _parse_post_filename(self, filename: str) -> Optional[Tuple[int, int]]:
+        """ファイル名から (投稿ID, 探索順) を取得（public_post_ → private_post_ → 旧形式の順）"""
+        name = filename[:-len('.json')] if filename.endswith('.json') else filename
+        for order, prefix in enumerate(('public_post_', 'private_post_')):
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+                break
+        else:
+            # 旧形式のファイル名対応
+            order = 2
         
-        if not all_posts:
-            return 1
+        try:
+            return int(name), order
+        except ValueError:
+            return None
+    
+    def _build_post_locations(self) -> None:
+        """投稿ディレクトリを1回だけ走査して投稿IDの所在インデックスを構築"""
+        locations: Dict[int, Tuple[Tuple[int, int], str, bool]] = {}
+        for dir_order, directory in enumerate([self.public_posts_dir, self.private_posts_dir]):
+            is_private = directory == self.private_posts_dir
+            for filename in self.record_store.list_names(directory):
+                parsed = self._parse_post_filename(filename)
+                if parsed is None:
+                    continue
+                
+                # 同じIDのファイルが複数ある場合は従来の探索順で最初に見つかるものを優先
+                post_id, name_order = parsed
+                rank = (dir_order, name_order)
+                if post_id not in locations or rank < locations[post_id][0]:
+                    locations[post_id] = (rank, os.path.join(directory, filename), is_private)
         
-        max_id = 0
-        for filename in all_posts:
-            try:
-                # post_public_1.json や post_private_1.json からIDを抽出
-                if filename.startswith('public_post_'):
-                    post_id = int(filename.replace('public_post_', '').replace('.json', ''))
-                elif filename.startswith('private_post_'):
-                    post_id = int(filename.replace('private_post_', '').replace('.json', ''))
-                else:
-                    # 旧形式のファイル名対応
-                    post_id = int(filename.replace('.json', ''))
-                max_id = max(max_id, post_id)
-            except ValueError:
-                continue
+        with self.index_lock:
+            self._post_locations = {post_id: (path, is_private)
+                                    for post_id, (_, path, is_private) in locations.items()}
         
-        return max_id + 1
+        logger.info(f"投稿の所在インデックスを構築しました: {len(self._post_locations)}件")
+    
+    def _posts_generation(self) -> Tuple[int, int]:
+        """公開・非公開の投稿ディレクトリの外部変更の世代"""
+        return (self.record_store.directory_generation(self.public_posts_dir),
+                self.record_store.directory_generation(self.private_posts_dir))
+    
+    def _refresh_post_locations(self) -> None:
+        """投稿ファイルが外部で追加・削除されていれば所在インデックスを作り直す"""
+        generation = self._posts_generation()
+        if generation == self._locations_generation:
+            return
+        
+        with self.index_lock:
+            self._locations_generation = generation
+            self._data_generation += 1
+            self._build_post_locations()
+            # 外部で変更された内容は次回の検索時に読み直す
+            self._search_indexes_ready = False
+    
+    def _locate_post(self, post_id) -> Optional[str]:
+        """投稿のファイルパスを取得（存在しないIDはファイルアクセスなしでNone）"""
+        try:
+            post_id = int(post_id)
+        except (TypeError, ValueError):
+            return None
+        
+        self._refresh_post_locations()
+        with self.index_lock:
+            location = self._post_locations.get(post_id)
+        return location[0] if location else None
+    
+    def post_exists(self, post_id) -> bool:
+        """投稿が存在するか確認（ファイルアクセスなし）"""
+        return self._locate_post(post_id) is not None
     
     def save_post(self, user_id: str, content: str, category: str = None, 
                   is_anonymous: bool = False, is_private: bool = False,
@@ -153,8 +267,10 @@ class PostManager:
         else:
             filename = os.path.join(self.public_posts_dir, f"public_post_{post_id}.json")
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(post_data, f, ensure_ascii=False, indent=2)
+        self.record_store.write(filename, post_data)
+        with self.index_lock:
+            self._post_locations[post_id] = (filename, is_private)
+        self._index_post(post_data)
         
         # アクセスログを記録
         self._log_access(user_id, post_id, "create", is_private)
@@ -164,231 +280,472 @@ class PostManager:
     def update_post_message_ref(self, post_id: int, message_id: str, channel_id: str) -> bool:
         """投稿のmessage_idとchannel_idを更新"""
         try:
-            # 公開・非公開両方のディレクトリをチェック
-            filenames_to_try = [
-                f"public_post_{post_id}.json",
-                f"private_post_{post_id}.json"
-            ]
+            filepath = self._locate_post(post_id)
+            post_data = self.record_store.read(filepath) if filepath else None
+            if not post_data:
+                return False
             
-            updated = False
-            for filename in filenames_to_try:
-                filepath = None
-                if os.path.exists(os.path.join(self.public_posts_dir, filename)):
-                    filepath = os.path.join(self.public_posts_dir, filename)
-                elif os.path.exists(os.path.join(self.private_posts_dir, filename)):
-                    filepath = os.path.join(self.private_posts_dir, filename)
-                
-                if filepath:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        post_data = json.load(f)
-                    
-                    # message_idとchannel_idを更新
-                    post_data['message_id'] = message_id
-                    post_data['channel_id'] = channel_id
-                    post_data['updated_at'] = datetime.now().isoformat()
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(post_data, f, ensure_ascii=False, indent=2)
-                    
-                    updated = True
-                    break
+            # message_idとchannel_idを更新
+            post_data['message_id'] = message_id
+            post_data['channel_id'] = channel_id
+            post_data['updated_at'] = datetime.now().isoformat()
             
-            return updated
+            self.record_store.write(filepath, post_data)
+            return True
         except Exception as e:
             logger.error(f"投稿のmessage_ref更新中にエラー: {e}")
             return False
     
     def get_post(self, post_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
         """投稿を取得"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.exists(filepath):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        # 非公開投稿のアクセス制御
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return None
-                            
-                            # 非公開投稿は復号
-                            post_data['content'] = self._decrypt_content(post_data['content'])
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "read", post_data.get('is_private', False))
-                        
-                        return post_data
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
-        
-        return None
+        post_data = self._read_post(post_id, user_id)
+        if post_data:
+            # アクセスログを記録
+            self._log_access(user_id or "anonymous", post_id, "read", post_data.get('is_private', False))
+        return post_data
     
-    def get_all_posts(self, user_id: str = None) -> List[Dict[str, Any]]:
-        """全投稿を取得"""
-        posts = []
-        
-        logger.info(f"🔍 PostManager.get_all_posts: user_id={user_id}")
-        logger.info(f"  - 公開ディレクトリ: {self.public_posts_dir}")
-        logger.info(f"  - 非公開ディレクトリ: {self.private_posts_dir}")
-        
-        # 公開・非公開両方のディレクトリをチェック
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            logger.info(f"🔍 ディレクトリチェック: {directory}")
-            
-            if not os.path.exists(directory):
-                logger.warning(f"  ⚠️ ディレクトリが存在しません: {directory}")
+    def _read_post(self, post_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
+        """投稿を読み込む（アクセスログは記録しない）"""
+        filepath = self._locate_post(post_id)
+        if not filepath:
+            return None
+        
+        post_data = self.record_store.read(filepath)
+        if not post_data:
+            return None
+        
+        # 非公開投稿のアクセス制御と復号
+        return self._apply_access_rule(post_data, user_id)
+    
+    def _apply_access_rule(self, post_data: Dict[str, Any], user_id: str = None) -> Optional[Dict[str, Any]]:
+        """非公開投稿のアクセス制御と復号"""
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return None
+            post_data['content'] = self._decrypt_post_content(post_data)
+        return post_data
+    
+    def _scan_posts(self, user_id: str = None, post_ids: Iterable[int] = None) -> Iterator[Dict[str, Any]]:
+        """所在インデックスの順（ID順）に各ファイルを1回だけ読み込む（post_ids指定時はそのIDのみを指定の順に）"""
+        self._refresh_post_locations()
+        with self.index_lock:
+            if post_ids is None:
+                filepaths = [path for _, (path, _) in sorted(self._post_locations.items())]
+            else:
+                filepaths = [self._post_locations[post_id][0] for post_id in dict.fromkeys(post_ids)
+                             if post_id in self._post_locations]
+        
+        for filepath in filepaths:
+            post_data = self.record_store.read(filepath)
+            if not post_data or 'id' not in post_data:
                 continue
             
-            files = [f for f in os.listdir(directory) if f.endswith('.json')]
-            logger.info(f"  📁 JSONファイル数: {len(files)}")
+            try:
+                post = self._apply_access_rule(post_data, user_id)
+            except Exception as e:
+                logger.error(f"❌ ファイル処理エラー: {os.path.basename(filepath)} - {e}")
+                continue
             
-            for filename in sorted(files):
-                try:
-                    # public_post_1.json や private_post_1.json からIDを抽出
-                    if filename.startswith('public_post_'):
-                        post_id = int(filename.replace('public_post_', '').replace('.json', ''))
-                    elif filename.startswith('private_post_'):
-                        post_id = int(filename.replace('private_post_', '').replace('.json', ''))
-                    else:
-                        # 旧形式のファイル名対応
-                        post_id = int(filename.replace('.json', ''))
-                    
-                    logger.info(f"  📄 ファイル読み込み: {filename} (ID: {post_id})")
-                    
-                    post = self.get_post(post_id, user_id)
-                    if post:
-                        posts.append(post)
-                        logger.info(f"    ✅ 投稿読み込み成功: ID={post_id}")
-                    else:
-                        logger.warning(f"    ❌ 投稿読み込み失敗: ID={post_id}")
-                        
-                except ValueError as e:
-                    logger.error(f"    ❌ ファイル名解析エラー: {filename} - {e}")
-                    continue
-                except Exception as e:
-                    logger.error(f"    ❌ ファイル処理エラー: {filename} - {e}")
-                    continue
-        
+            if post:
+                yield post
+    
+    def iter_posts(self, user_id: str = None, post_ids: Iterable[int] = None) -> Iterator[Dict[str, Any]]:
+        """閲覧可能な投稿を1件ずつ返す（読み終えた時点で要約のアクセスログを1件だけ記録）"""
+        post_count = 0
+        private_count = 0
+        try:
+            for post in self._scan_posts(user_id, post_ids):
+                post_count += 1
+                if post.get('is_private'):
+                    private_count += 1
+                yield post
+        finally:
+            self.access_log.log_bulk_read(user_id or "anonymous", post_count, private_count)
+    
+    def get_all_posts(self, user_id: str = None) -> List[Dict[str, Any]]:
+        """全投稿を取得"""
+        posts = list(self.iter_posts(user_id))
         logger.info(f"🔍 get_all_posts完了: 全{len(posts)}件の投稿を取得")
         return posts
     
     def update_post(self, post_id: int, content: str = None, category: str = None, 
                    image_url: str = None, user_id: str = None, message_id: str = None, channel_id: str = None) -> bool:
         """投稿を更新"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
-                
-                if os.path.exists(filepath):
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        # 非公開投稿のアクセス制御
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return False
-                        
-                        if content is not None:
-                            if post_data.get('is_private'):
-                                post_data['content'] = self._encrypt_content(content)
-                            else:
-                                post_data['content'] = content
-                        
-                        if category is not None:
-                            post_data['category'] = category
-                        
-                        if image_url is not None:
-                            post_data['image_url'] = image_url
-                        
-                        if message_id is not None:
-                            post_data['message_id'] = message_id
-                        
-                        if channel_id is not None:
-                            post_data['channel_id'] = channel_id
-                        
-                        post_data['updated_at'] = datetime.now().isoformat()
-                        
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            json.dump(post_data, f, ensure_ascii=False, indent=2)
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "update", post_data.get('is_private', False))
-                        
-                        return True
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
+        filepath = self._locate_post(post_id)
+        post_data = self.record_store.read(filepath) if filepath else None
+        if not post_data:
+            return False
+        
+        # 非公開投稿のアクセス制御
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return False
+        
+        if content is not None:
+            if post_data.get('is_private'):
+                post_data['content'] = self._encrypt_content(content)
+            else:
+                post_data['content'] = content
         
-        return False
+        if category is not None:
+            post_data['category'] = category
+        
+        if image_url is not None:
+            post_data['image_url'] = image_url
+        
+        if message_id is not None:
+            post_data['message_id'] = message_id
+        
+        if channel_id is not None:
+            post_data['channel_id'] = channel_id
+        
+        post_data['updated_at'] = datetime.now().isoformat()
+        
+        self.record_store.write(filepath, post_data)
+        self._invalidate_decrypted(post_id)
+        self._index_post(post_data)
+        
+        # アクセスログを記録
+        self._log_access(user_id or "anonymous", post_id, "update", post_data.get('is_private', False))
+        
+        return True
     
     def delete_post(self, post_id: int, user_id: str = None) -> bool:
         """投稿を削除"""
-        # 公開・非公開両方のディレクトリをチェック
-        # 新形式のファイル名を試す
-        filenames_to_try = [
-            f"public_post_{post_id}.json",
-            f"private_post_{post_id}.json",
-            f"{post_id}.json"  # 旧形式対応
-        ]
-        
-        for directory in [self.public_posts_dir, self.private_posts_dir]:
-            for filename in filenames_to_try:
-                filepath = os.path.join(directory, filename)
+        filepath = self._locate_post(post_id)
+        
+        # アクセス制御チェック
+        post_data = self.record_store.read(filepath) if filepath else None
+        if not post_data:
+            return False
+        
+        if post_data.get('is_private'):
+            if not user_id or post_data.get('user_id') != user_id:
+                return False
+        
+        # 削除実行
+        if not self.record_store.delete(filepath):
+            return False
+        with self.index_lock:
+            self._post_locations.pop(int(post_id), None)
+        self._invalidate_decrypted(post_id)
+        self._unindex_post(post_id)
+        
+        # アクセスログを記録
+        self._log_access(user_id or "anonymous", post_id, "delete", post_data.get('is_private', False))
+        
+        return True
+    
+    def _iter_raw_posts(self, post_ids: List[int] = None) -> Iterator[Dict[str, Any]]:
+        """投稿を保存されている形のまま返す（非公開投稿は暗号化されたまま、post_ids指定時はそのIDのみを指定の順に）"""
+        with self.index_lock:
+            if post_ids is None:
+                filepaths = [path for _, (path, _) in sorted(self._post_locations.items())]
+            else:
+                filepaths = [self._post_locations[post_id][0] for post_id in post_ids
+                             if post_id in self._post_locations]
+        
+        for filepath in filepaths:
+            post_data = self.record_store.read(filepath)
+            if post_data and 'id' in post_data:
+                yield post_data
+    
+    def _index_post(self, post_data: Dict[str, Any]) -> None:
+        """検索用インデックスに投稿を反映（未構築の場合は構築時にまとめて反映される）"""
+        with self.index_lock:
+            self._data_generation += 1
+            if not self._search_indexes_ready:
+                return
+            post_id = int(post_data['id'])
+            self.created_index.add(post_id, post_data.get('created_at'))
+            self._unindex_author(post_id)
+            user_id = post_data.get('user_id')
+            if user_id:
+                bisect.insort(self._posts_by_user.setdefault(str(user_id), []), post_id)
+                self._post_authors[post_id] = str(user_id)
+            self._set_flag(self._private_posts, post_id, post_data.get('is_private'))
+            self._set_flag(self._anonymous_posts, post_id, post_data.get('is_anonymous'))
+            self._unindex_category(post_id)
+            # 非公開投稿の本文は暗号化されているため全文検索・カテゴリー集計の対象にしない
+            if post_data.get('is_private'):
+                self.text_index.remove(post_id)
+                return
+            
+            self.text_index.add(post_id, (post_data.get('content'), post_data.get('category')))
+            
+            label = (post_data.get('category') or '').strip()
+            key = normalize_text(label)
+            if key:
+                bisect.insort(self._posts_by_category.setdefault(key, []), post_id)
+                self._post_categories[post_id] = (key, label)
+                labels = self._category_labels.setdefault(key, {})
+                labels[label] = labels.get(label, 0) + 1
+    
+    def _unindex_category(self, post_id: int) -> None:
+        """カテゴリーインデックスから投稿を削除（ロックは呼び出し側で取得）"""
+        entry = self._post_categories.pop(post_id, None)
+        if entry is None:
+            return
+        
+        key, label = entry
+        post_ids = self._posts_by_category.get(key, [])
+        position = bisect.bisect_left(post_ids, post_id)
+        if position < len(post_ids) and post_ids[position] == post_id:
+            del post_ids[position]
+        if not post_ids:
+            self._posts_by_category.pop(key, None)
+            self._category_labels.pop(key, None)
+            return
+        
+        labels = self._category_labels[key]
+        labels[label] -= 1
+        if labels[label] <= 0:
+            del labels[label]
+    
+    @staticmethod
+    def _set_flag(post_ids: Set[int], post_id: int, value: Any) -> None:
+        """フラグの集合に投稿IDを追加・削除"""
+        if value:
+            post_ids.add(post_id)
+        else:
+            post_ids.discard(post_id)
+    
+    def _unindex_author(self, post_id: int) -> None:
+        """投稿者インデックスから投稿を削除（ロックは呼び出し側で取得）"""
+        user_id = self._post_authors.pop(post_id, None)
+        if user_id is None:
+            return
+        
+        post_ids = self._posts_by_user.get(user_id, [])
+        position = bisect.bisect_left(post_ids, post_id)
+        if position < len(post_ids) and post_ids[position] == post_id:
+            del post_ids[position]
+        if not post_ids:
+            self._posts_by_user.pop(user_id, None)
+    
+    def _unindex_post(self, post_id) -> None:
+        """検索用インデックスから投稿を削除"""
+        with self.index_lock:
+            self._data_generation += 1
+            if self._search_indexes_ready:
+                self.text_index.remove(int(post_id))
+                self.created_index.remove(int(post_id))
+                self._unindex_author(int(post_id))
+                self._private_posts.discard(int(post_id))
+                self._anonymous_posts.discard(int(post_id))
+                self._unindex_category(int(post_id))
+    
+    def search_indexes_ready(self) -> bool:
+        """検索用インデックスが構築済みか確認（構築はしない）"""
+        return self._search_indexes_ready
+    
+    def warm_search_indexes(self) -> None:
+        """検索用インデックスを事前に構築（起動時にイベントループの外で呼ぶ）"""
+        self._ensure_search_indexes()
+    
+    def _ensure_search_indexes(self) -> None:
+        """検索用インデックスを構築（構築済みなら何もしない）"""
+        self._refresh_post_locations()
+        with self.index_lock:
+            if self._search_indexes_ready:
+                return
+            
+            started = time.perf_counter()
+            self.text_index.clear()
+            self._posts_by_category.clear()
+            self._post_categories.clear()
+            self._category_labels.clear()
+            self.created_index.clear()
+            self._posts_by_user.clear()
+            self._post_authors.clear()
+            self._private_posts.clear()
+            self._anonymous_posts.clear()
+            self._search_indexes_ready = True
+            for post_data in self._iter_raw_posts():
+                self._index_post(post_data)
+            
+            stats = self.text_index.get_stats()
+            logger.info(
+                f"検索用インデックスを構築しました: {stats['documents']}件, n-gram {stats['grams']}種, "
+                f"カテゴリー {len(self._posts_by_category)}種, {round((time.perf_counter() - started) * 1000, 2)}ms"
+            )
+    
+    def search_post_ids(self, keyword: str) -> List[int]:
+        """本文またはカテゴリーにキーワードを含む公開投稿のID（NFKC・カナの違いを無視、ID順）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            return sorted(self.text_index.search(keyword))
+    
+    def post_ids_by_time(self, date_from: datetime = None, date_to: datetime = None,
+                         newest_first: bool = True, limit: int = None) -> List[int]:
+        """期間内（両端を含む）の投稿IDを作成日時順に取得（非公開投稿も含むので読み込み時に閲覧権限を確認すること）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            return self.created_index.range_ids(date_from, date_to, newest_first, limit)
+    
+    def get_data_generation(self) -> int:
+        """投稿の追加・更新・削除のたびに進む世代（外部での変更も確認してから返す）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            return self._data_generation
+    
+    def post_ids_by_user(self, user_id: str, newest_first: bool = False) -> List[int]:
+        """投稿者の投稿ID（ID順、newest_first指定時は作成日時の新しい順、他の投稿者のファイルは読まない）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            post_ids = list(self._posts_by_user.get(str(user_id), []))
+            if newest_first:
+                post_ids.sort(key=lambda post_id: (self.created_index.get_epoch(post_id) or 0, post_id), reverse=True)
+        return post_ids
+    
+    def search_post_ids_by_category(self, category: str) -> List[int]:
+        """カテゴリーに指定した文字列を含む公開投稿のID（ID順、走査するのはカテゴリーの種類数だけ）"""
+        query = normalize_text(category.strip() if category else '')
+        self._ensure_search_indexes()
+        with self.index_lock:
+            post_ids = [post_id for key, ids in self._posts_by_category.items() if query in key for post_id in ids]
+        return sorted(post_ids)
+    
+    def _category_label(self, key: str) -> str:
+        """正規化したカテゴリーの表示名（最も多く使われている表記、ロックは呼び出し側で取得）"""
+        labels = self._category_labels[key]
+        return max(labels, key=lambda label: (labels[label], label))
+    
+    def get_category_count(self, category: str) -> int:
+        """カテゴリーの公開投稿数（表記の違いは正規化して同じカテゴリーとして数える）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            return len(self._posts_by_category.get(normalize_text((category or '').strip()), []))
+    
+    def get_category_counts(self, limit: int = None) -> List[Tuple[str, int]]:
+        """カテゴリーごとの公開投稿数（多い順、表示名と件数）"""
+        self._ensure_search_indexes()
+        with self.index_lock:
+            counts = [(self._category_label(key), len(ids)) for key, ids in self._posts_by_category.items()]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts[:limit] if limit else counts
+    
+    def _query_post_ids(self, query: PostQuery, user_id: str = None) -> Tuple[List[int], Set[int]]:
+        """インデックスだけで条件に一致する投稿IDを指定の順に並べる（ファイルは読まない）
+        
+        戻り値は (投稿ID, 読み込み後にキーワード・カテゴリーの確認が必要な非公開投稿のID)。
+        非公開投稿の本文は暗号化されていて全文検索の対象外のため、閲覧者本人の投稿だけを残して後で確認する。
+        """
+        self._ensure_search_indexes()
+        with self.index_lock:
+            # 公開投稿はキーワード・カテゴリーのインデックスで絞り込む
+            public_ids: Optional[Set[int]] = None
+            scores: Dict[int, float] = {}
+            if query.fuzzy:
+                scores = dict(self.text_index.similar(query.keyword))
+                public_ids = set(scores)
+            elif query.keyword:
+                public_ids = set(self.search_post_ids(query.keyword))
+            if query.category:
+                category_ids = set(self.search_post_ids_by_category(query.category))
+                public_ids = category_ids if public_ids is None else public_ids & category_ids
+            
+            # 候補が絞り込めている場合はその中だけを並べ、そうでなければ期間で切り出す
+            candidate_ids: Optional[Iterable[int]] = None
+            if query.author_id:
+                candidate_ids = self._posts_by_user.get(query.author_id, [])
+            elif public_ids is not None:
+                candidate_ids = set(public_ids)
+                if user_id and query.visibility != VISIBILITY_PUBLIC:
+                    candidate_ids.update(self._posts_by_user.get(str(user_id), []))
+            
+            if candidate_ids is None:
+                ordered_ids = self.post_ids_by_time(query.date_from, query.date_to,
+                                                    newest_first=query.order == ORDER_NEWEST)
+            else:
+                ordered_ids = self.created_index.sort_ids(candidate_ids, query.date_from, query.date_to,
+                                                          newest_first=query.order == ORDER_NEWEST)
+            if query.order == ORDER_ID:
+                ordered_ids.sort()
+            if query.fuzzy:
+                # 一致率の高い順（安定ソートなので同じ一致率の中では指定の順のまま）
+                ordered_ids.sort(key=lambda post_id: -scores.get(post_id, 0.0))
+            
+            post_ids = []
+            verify_ids = set()
+            for post_id in ordered_ids:
+                author = self._post_authors.get(post_id)
+                if query.author_id and author != query.author_id:
+                    continue
+                if query.is_anonymous is not None and (post_id in self._anonymous_posts) != bool(query.is_anonymous):
+                    continue
                 
-                if os.path.exists(filepath):
-                    try:
-                        # アクセス制御チェック
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            post_data = json.load(f)
-                        
-                        if post_data.get('is_private'):
-                            if not user_id or post_data.get('user_id') != user_id:
-                                return False
-                        
-                        # 削除実行
-                        os.remove(filepath)
-                        
-                        # アクセスログを記録
-                        self._log_access(user_id or "anonymous", post_id, "delete", post_data.get('is_private', False))
-                        
-                        return True
-                    except (json.JSONDecodeError, FileNotFoundError):
+                if post_id in self._private_posts:
+                    if query.visibility == VISIBILITY_PUBLIC or not user_id or author != str(user_id):
+                        continue
+                    # 非公開投稿は本文がインデックスにないため、あいまい検索の対象にしない
+                    if query.fuzzy:
+                        continue
+                    if query.keyword or query.category:
+                        verify_ids.add(post_id)
+                else:
+                    if query.visibility == VISIBILITY_PRIVATE:
                         continue
+                    if public_ids is not None and post_id not in public_ids:
+                        continue
+                post_ids.append(post_id)
+        
+        return post_ids, verify_ids
+    
+    def query_posts(self, query: PostQuery, user_id: str = None) -> Iterator[Dict[str, Any]]:
+        """条件に一致する閲覧可能な投稿を指定の順に1件ずつ返す
+        
+        公開範囲・投稿者・匿名・期間・キーワード・カテゴリーはインデックスで判定し、
+        一致した投稿だけを読み込んで復号する。並び順はインデックスで確定しているため、
+        limit件を返した時点で残りの投稿は読まない。
+        最後まで返した結果のIDは、条件とデータの世代をキーにキャッシュして次回は判定を省く。
+        """
+        generation = self.get_data_generation()
+        cache_key = (query.key(), str(user_id) if user_id else None)
+        post_ids = self.query_cache.get(cache_key, generation)
+        cached = post_ids is not None
+        if cached:
+            verify_ids: Set[int] = set()
+        else:
+            post_ids, verify_ids = self._query_post_ids(query, user_id)
         
-        return False
+        result_ids = []
+        completed = False
+        post_count = 0
+        private_count = 0
+        try:
+            for start in range(0, len(post_ids), QUERY_BATCH_SIZE):
+                for post_data in self._iter_raw_posts(post_ids[start:start + QUERY_BATCH_SIZE]):
+                    needs_verify = int(post_data['id']) in verify_ids
+                    # カテゴリーは暗号化されていないので復号の前に確認する
+                    if needs_verify and not query.matches_category(post_data):
+                        continue
+                    
+                    try:
+                        post = self._apply_access_rule(post_data, user_id)
+                    except Exception as e:
+                        logger.error(f"❌ 投稿の復号エラー: ID={post_data.get('id')} - {e}")
+                        continue
+                    if not post or (needs_verify and not query.matches_keyword(post)):
+                        continue
+                    
+                    post_count += 1
+                    if post.get('is_private'):
+                        private_count += 1
+                    result_ids.append(int(post['id']))
+                    yield post
+                    if query.limit and post_count >= query.limit:
+                        completed = True
+                        return
+            completed = True
+        finally:
+            # 途中で打ち切られた結果はキャッシュしない
+            if completed and not cached:
+                self.query_cache.put(cache_key, generation, result_ids)
+            self.access_log.log_bulk_read(user_id or "anonymous", post_count, private_count)
     
     def search_posts(self, keyword: str = None, category: str = None, 
                      user_id: str = None) -> List[Dict[str, Any]]:
-        """投稿を検索"""
-        posts = self.get_all_posts(user_id)
-        
-        if keyword:
-            keyword = keyword.lower()
-            posts = [p for p in posts if keyword in p.get('content', '').lower()]
-        
-        if category:
-            posts = [p for p in posts if p.get('category') == category]
-        
-        if user_id:
-            posts = [p for p in posts if p.get('user_id') == user_id]
-        
-        return posts
+        """投稿を検索（ID順、user_id指定時はその投稿者の投稿のみ）"""
+        query = PostQuery(keyword=keyword, category=category, author_id=user_id, order=ORDER_ID)
+        return list(self.query_posts(query, user_id))
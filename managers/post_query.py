@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Dict, Any, Tuple
+
+from managers.text_index import normalize_text
+
+# 並び順
+ORDER_NEWEST = "newest"
+ORDER_OLDEST = "oldest"
+ORDER_ID = "id"
+ORDERS = (ORDER_NEWEST, ORDER_OLDEST, ORDER_ID)
+
+# 公開範囲（非公開投稿はいずれの場合も閲覧者本人のものだけが対象）
+VISIBILITY_ALL = "all"
+VISIBILITY_PUBLIC = "public"
+VISIBILITY_PRIVATE = "private"
+VISIBILITIES = (VISIBILITY_ALL, VISIBILITY_PUBLIC, VISIBILITY_PRIVATE)
+
+class PostQuery:
+    """投稿検索の条件（PostManager.query_postsに渡す）
+    
+    キーワード・カテゴリーは作成時に正規化しておき、インデックスと同じ基準で比較する。
+    """
+    
+    def __init__(self, keyword: str = None, category: str = None, author_id: str = None,
+                 visibility: str = VISIBILITY_ALL, is_anonymous: bool = None,
+                 date_from: datetime = None, date_to: datetime = None,
+                 limit: int = None, order: str = ORDER_NEWEST, fuzzy: bool = False):
+        if visibility not in VISIBILITIES:
+            raise ValueError(f"不明な公開範囲です: {visibility}")
+        if order not in ORDERS:
+            raise ValueError(f"不明な並び順です: {order}")
+        
+        self.keyword = normalize_text(keyword.strip()) if keyword and keyword.strip() else None
+        self.category = normalize_text(category.strip()) if category and category.strip() else None
+        self.author_id = str(author_id) if author_id else None
+        self.visibility = visibility
+        self.is_anonymous = is_anonymous
+        self.date_from = date_from
+        self.date_to = date_to
+        self.limit = limit
+        self.order = order
+        # あいまい検索ではキーワードとの一致率が高い順（同じ一致率の中ではorderの順）に並べる
+        self.fuzzy = bool(fuzzy and self.keyword)
+    
+    def matches_keyword(self, post: Dict[str, Any]) -> bool:
+        """本文またはカテゴリーにキーワードを含むか（インデックスを使えない非公開投稿の確認用）"""
+        if not self.keyword:
+            return True
+        return self.keyword in normalize_text(post.get('content')) or self.keyword in normalize_text(post.get('category'))
+    
+    def matches_category(self, post: Dict[str, Any]) -> bool:
+        """カテゴリーに指定した文字列を含むか（インデックスを使えない非公開投稿の確認用）"""
+        if not self.category:
+            return True
+        return self.category in normalize_text(post.get('category'))
+    
+    def key(self) -> Tuple:
+        """正規化した条件の組（同じ検索かどうかの判定用）"""
+        return (
+            self.keyword, self.category, self.author_id, self.visibility, self.is_anonymous,
+            self.date_from.isoformat() if self.date_from else None,
+            self.date_to.isoformat() if self.date_to else None,
+            self.limit, self.order, self.fuzzy
+        )
+    
+    def __repr__(self) -> str:
+        conditions = ", ".join(f"{name}={value!r}" for name, value in vars(self).items() if value is not None)
+        return f"PostQuery({conditions})"
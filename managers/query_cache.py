@@ -0,0 +1,58 @@
+import threading
+from typing import Dict, Any, Hashable, List, Optional
+
+from managers.lru_cache import LRUCache
+
+# 保持する検索結果の上限
+QUERY_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_MAX_BYTES = 1024 * 1024
+
+class QueryCache:
+    """正規化した検索条件 -> 結果のIDの並びのキャッシュ
+    
+    各エントリは作成時のデータの世代を持ち、投稿・リプライの追加・更新・削除で
+    世代が進んでいれば使わない（古いエントリはLRUで追い出される）。
+    """
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        # key -> (世代, IDの並び)
+        self.results = LRUCache(max_entries, max_bytes, sizeof=lambda entry: 120 + 36 * len(entry[1]))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+    
+    def get(self, key: Hashable, generation: int) -> Optional[List[int]]:
+        """世代が一致する結果を取得（ない場合・古い場合はNone）"""
+        entry = self.results.get(key)
+        with self.lock:
+            if entry is not None and entry[0] == generation:
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+            if entry is not None:
+                self.stale += 1
+        if entry is not None:
+            self.results.invalidate(key)
+        return None
+    
+    def put(self, key: Hashable, generation: int, result_ids: List[int]) -> None:
+        """結果を登録"""
+        self.results.put(key, (generation, list(result_ids)))
+    
+    def clear(self) -> None:
+        """全件を削除"""
+        self.results.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """件数・メモリ量・ヒット率を取得"""
+        stats = self.results.get_stats()
+        with self.lock:
+            lookups = self.hits + self.misses
+            stats.update({
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            })
+        return stats
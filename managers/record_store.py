@@ -0,0 +1,356 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from managers.serializer import dumps, loads, loads_line
+from managers.storage_layout import StorageLayout
+from managers.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 配置設定（.layout.json）の変更を確認する間隔（秒）。移行コマンドの待ち時間より短くする
+LAYOUT_CHECK_INTERVAL_SECONDS = 1.0
+# ディレクトリの更新時刻で外部の変更（手作業・移行コマンド・別プロセス）を確認する間隔（秒）
+DIRECTORY_CHECK_INTERVAL_SECONDS = 5.0
+# ファイルから読み込んだレコードのキャッシュ上限
+RECORD_CACHE_MAX_ENTRIES = 8192
+RECORD_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# 使用するストレージ（json / sqlite / segment）を指定する環境変数
+STORAGE_BACKEND_ENV = "STORAGE_BACKEND"
+
+def fsync_directory(directory: str) -> None:
+    """ディレクトリのエントリー（ファイルの置き換え・削除）を永続化"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Windowsなどディレクトリを開けない環境では何もしない
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _mtime_ns(path: str) -> Optional[int]:
+    """更新時刻（存在しない場合はNone）"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class RecordStore:
+    """レコードファイルの読み書き管理
+    
+    書き込みは一時ファイルに書いてfsyncしてから置き換えるため、
+    呼び出しから戻った時点でファイルとして確定している（クラッシュしても壊れない）。
+    """
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        self.legacy_wal_file = os.path.join(base_dir, ".wal.jsonl")
+        os.makedirs(base_dir, exist_ok=True)
+        
+        # フラット / シャード配置の切り替え（キーは常にフラット配置のパス）
+        self.layout = StorageLayout(base_dir)
+        self._layout_checked_at = time.monotonic()
+        
+        # 書き込み同士の排他（読み込みはロックを取らない）
+        self.lock = threading.Lock()
+        # 自分で行った書き込み・削除の回数（スナップショットの更新判定に使う）
+        self.write_count = 0
+        
+        # ファイルの内容のキャッシュ（実際のパス -> ((mtime_ns, size), 生のバイト列)）
+        # git pullなど外部で書き換えられた場合はstatの結果が変わるので読み直される
+        self.record_cache = LRUCache(RECORD_CACHE_MAX_ENTRIES, RECORD_CACHE_MAX_BYTES,
+                                     sizeof=lambda entry: len(entry[1]) + 64)
+        # 外部での変更（git pullなど）が通知されるたびに進む世代
+        self.external_generation = 0
+        # ディレクトリの更新時刻から検出した外部での変更の世代（論理ディレクトリごと）
+        self._directory_generations: Dict[str, int] = {}
+        # 最後に確認した、または自分で書き込んだ後の実際のディレクトリの更新時刻
+        self._known_mtimes: Dict[str, Optional[int]] = {}
+        self._directory_checked_at: Dict[str, float] = {}
+        # スナップショットから復元したディレクトリごとのレコード（read_allで1回だけ使う）
+        self._preloaded: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        
+        # 以前のバージョンで反映されずに残ったWALがあれば反映する
+        self._replay_legacy_wal()
+    
+    def _key(self, path: str) -> str:
+        """パスを正規化"""
+        return os.path.normpath(path)
+    
+    def _reload_layout_if_due(self) -> None:
+        """配置設定の変更（移行コマンドなど）を一定間隔で確認"""
+        now = time.monotonic()
+        if now - self._layout_checked_at < LAYOUT_CHECK_INTERVAL_SECONDS:
+            return
+        self._layout_checked_at = now
+        self.layout.reload_if_changed()
+    
+    def _replay_legacy_wal(self) -> None:
+        """以前のバージョンのWAL（data/.wal.jsonl）に残った変更をファイルに反映して削除"""
+        if not os.path.exists(self.legacy_wal_file):
+            return
+        
+        # 同じレコードへの変更は最後のものだけを反映する
+        latest: Dict[str, Optional[Dict[str, Any]]] = {}
+        with open(self.legacy_wal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = loads_line(line)
+                except ValueError:
+                    # fsync前にクラッシュした最終行は確定していないので捨てる
+                    continue
+                path = self._key(os.path.join(self.base_dir, entry['path']))
+                latest[path] = entry['data'] if entry['op'] == 'write' else None
+        
+        if latest:
+            logger.info(f"残っていたWALを反映します: {len(latest)}件")
+        for path, data in latest.items():
+            if data is not None:
+                self.write(path, data)
+            else:
+                self.delete(path)
+        
+        for path in (self.legacy_wal_file, f"{self.legacy_wal_file}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def write(self, path: str, data: Dict[str, Any]) -> None:
+        """レコードを書き込む（fsync済みの一時ファイルで置き換える）"""
+        self._reload_layout_if_due()
+        raw = dumps(data)
+        key = self._key(path)
+        paths = self.layout.candidates(key)
+        target = paths[0]
+        
+        with self.lock:
+            self._discard_preloaded(key)
+            self._check_own_directories(key, paths)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_file = f"{target}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, target)
+            self.record_cache.invalidate(target)
+            touched_dirs = {os.path.dirname(target)}
+            
+            # 移行前の配置に残っている古いファイルを消す
+            for stale in paths[1:]:
+                if self._remove_file(stale):
+                    touched_dirs.add(os.path.dirname(stale))
+            
+            for directory in touched_dirs:
+                fsync_directory(directory)
+            self._remember_own_directories(touched_dirs | {os.path.dirname(key)})
+            self.write_count += 1
+    
+    def delete(self, path: str) -> bool:
+        """レコードを削除"""
+        self._reload_layout_if_due()
+        key = self._key(path)
+        paths = self.layout.candidates(key)
+        with self.lock:
+            self._discard_preloaded(key)
+            self._check_own_directories(key, paths)
+            touched_dirs = {os.path.dirname(candidate) for candidate in paths if self._remove_file(candidate)}
+            if not touched_dirs:
+                return False
+            
+            for directory in touched_dirs:
+                fsync_directory(directory)
+            self._remember_own_directories(touched_dirs | {os.path.dirname(key)})
+            self.write_count += 1
+        return True
+    
+    def _check_own_directories(self, key: str, paths: List[str]) -> None:
+        """自分で書き込む直前に、書き込み先のディレクトリが外部で変更されていないか確認（self.lockを保持して呼ぶ）
+        
+        書き込み後の更新時刻を記録し直すため、ここで確認しないと直前の外部の変更を見落とす。
+        """
+        # シャードディレクトリを作ると論理ディレクトリの更新時刻も変わるので両方を見る
+        for directory in {os.path.dirname(path) for path in paths} | {os.path.dirname(key)}:
+            if directory not in self._known_mtimes:
+                continue
+            if _mtime_ns(directory) != self._known_mtimes[directory]:
+                logical_dir = os.path.dirname(key)
+                self._directory_generations[logical_dir] = self._directory_generations.get(logical_dir, 0) + 1
+    
+    def _remember_own_directories(self, directories) -> None:
+        """自分で書き込んだ後のディレクトリの更新時刻を記録（外部の変更と区別するため、self.lockを保持して呼ぶ）"""
+        for directory in directories:
+            self._known_mtimes[directory] = _mtime_ns(directory)
+    
+    def _directory_mtimes(self, directory: str) -> Dict[str, Optional[int]]:
+        """論理ディレクトリとそのシャードディレクトリの更新時刻"""
+        mtimes = {directory: _mtime_ns(directory)}
+        if mtimes[directory] is not None and self.layout.may_have_shards(directory):
+            with os.scandir(directory) as entries:
+                mtimes.update((entry.path, entry.stat().st_mtime_ns) for entry in entries if entry.is_dir())
+        return mtimes
+    
+    def _discard_preloaded(self, key: str) -> None:
+        """スナップショットから復元したレコードのうち、書き換えたものを使わないようにする"""
+        preloaded = self._preloaded.get(os.path.dirname(key))
+        if preloaded:
+            preloaded.pop(os.path.basename(key), None)
+    
+    def _remove_file(self, path: str) -> bool:
+        """ファイルを削除してキャッシュからも取り除く（存在しなかった場合はFalse）"""
+        self.record_cache.invalidate(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+    
+    def read(self, path: str) -> Optional[Dict[str, Any]]:
+        """レコードを読み込む（存在しない・壊れている場合はNone）"""
+        self._reload_layout_if_due()
+        for path in self.layout.candidates(self._key(path)):
+            try:
+                return self._read_file(path)
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                return None
+        return None
+    
+    def _read_file(self, path: str) -> Any:
+        """ファイルを読み込む（statが前回と同じならメモリ上の内容を使う）
+        
+        Raises:
+            FileNotFoundError: ファイルが存在しない場合
+            ValueError: 解析できない場合
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.record_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            # バイト列から毎回変換するので呼び出し側が変更してもキャッシュに影響しない
+            return loads(cached[1])
+        
+        with open(path, 'rb') as f:
+            raw = f.read()
+        # stat後に書き換えられた場合も次回のstatで不一致になるので古い内容は返らない
+        self.record_cache.put(path, (signature, raw))
+        return loads(raw)
+    
+    def seed_cache(self, path: str, signature: Tuple[int, int], raw: bytes) -> None:
+        """スナップショットなどから復元した内容をキャッシュに登録（読み込み時にstatで検証される）"""
+        self.record_cache.put(path, (signature, raw))
+    
+    def preload(self, directory: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """スナップショットで検証済みのレコード（ファイル名 -> データ）を登録"""
+        with self.lock:
+            self._preloaded[self._key(directory)] = records
+    
+    def read_all(self, directory: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """ディレクトリ内の全レコードを (ファイル名, データ) で取得（インデックス構築用）
+        
+        スナップショットから復元済みのレコードはファイルを読まずに使い、
+        それ以外（スナップショットより新しいファイル）は通常どおり読み込む。
+        """
+        directory = self._key(directory)
+        with self.lock:
+            preloaded = self._preloaded.pop(directory, {})
+        
+        records = []
+        for name in self.list_names(directory):
+            data = preloaded.get(name)
+            if data is None:
+                data = self.read(os.path.join(directory, name))
+            if data is not None:
+                records.append((name, data))
+        return records
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """ファイル内容のキャッシュの件数・メモリ量・ヒット率を取得"""
+        return self.record_cache.get_stats()
+    
+    def directory_generation(self, directory: str) -> int:
+        """ディレクトリが外部（git pull・手作業・移行コマンド・別プロセスなど）で変更されるたびに増える世代番号
+        
+        notify_record_stores_changedでの通知に加えて、DIRECTORY_CHECK_INTERVAL_SECONDSごとに
+        ディレクトリの更新時刻を確認する（それ以外の呼び出しではディスクに触れない）。
+        自分の書き込みでは増えないので、マネージャーは値が変わった時だけインデックスを作り直せばよい。
+        """
+        directory = self._key(directory)
+        now = time.monotonic()
+        with self.lock:
+            checked_at = self._directory_checked_at.get(directory)
+            if checked_at is None or now - checked_at >= DIRECTORY_CHECK_INTERVAL_SECONDS:
+                self._directory_checked_at[directory] = now
+                current = self._directory_mtimes(directory)
+                known = {path: self._known_mtimes.get(path) for path in current}
+                # 初回は基準を記録するだけ（呼び出し側はこの時点のディスクの内容でインデックスを作る）
+                if checked_at is not None and current != known:
+                    self._directory_generations[directory] = self._directory_generations.get(directory, 0) + 1
+                    logger.info(f"外部でのファイル変更を検出しました: {directory}")
+                self._known_mtimes.update(current)
+            return self.external_generation + self._directory_generations.get(directory, 0)
+    
+    def mark_external_change(self) -> None:
+        """外部での変更（git pullなど）を通知し、全ディレクトリの世代を進める"""
+        with self.lock:
+            self.external_generation += 1
+            generation = self.external_generation
+        logger.info(f"外部でのファイル変更の通知を受けました (世代={generation})")
+    
+    def exists(self, path: str) -> bool:
+        """レコードが存在するか確認"""
+        self._reload_layout_if_due()
+        return any(os.path.exists(path) for path in self.layout.candidates(self._key(path)))
+    
+    def list_names(self, directory: str) -> List[str]:
+        """ディレクトリ内のレコードファイル名一覧"""
+        self._reload_layout_if_due()
+        return sorted(set(self.layout.list_names(self._key(directory))))
+    
+    def flush(self) -> None:
+        """書き込みは呼び出し時にファイルへ確定しているため何もしない（SegmentRecordStoreと共通のインターフェース）"""
+    
+    def close(self) -> None:
+        """閉じる必要のあるリソースは持たない（SegmentRecordStoreと共通のインターフェース）"""
+
+_record_stores: Dict[str, RecordStore] = {}
+_record_stores_lock = threading.Lock()
+
+def get_record_store(base_dir: str = "data") -> RecordStore:
+    """base_dirごとに共有されるRecordStoreを取得（STORAGE_BACKEND=segmentならセグメントストア）"""
+    key = os.path.abspath(base_dir)
+    with _record_stores_lock:
+        if key not in _record_stores:
+            if os.getenv(STORAGE_BACKEND_ENV) == "segment" and os.getenv("GITHUB_ACTIONS") == "true":
+                # data/segments/ はGitHubに同期されないため、チェックアウトし直すと変更が失われる
+                logger.warning("セグメントストアはGitHubに同期されないため、GitHub ActionsではJSONファイルに保存します")
+                _record_stores[key] = RecordStore(base_dir)
+            elif os.getenv(STORAGE_BACKEND_ENV) == "segment":
+                from managers.segment_store import SegmentRecordStore
+                _record_stores[key] = SegmentRecordStore(base_dir)
+            else:
+                _record_stores[key] = RecordStore(base_dir)
+        return _record_stores[key]
+
+def notify_record_stores_changed() -> None:
+    """git pullなどでdata/が外部から変更されたことを全てのRecordStoreに通知"""
+    with _record_stores_lock:
+        stores = list(_record_stores.values())
+    for store in stores:
+        store.mark_external_change()
+
+def flush_record_stores() -> None:
+    """全てのRecordStoreの未反映の変更を書き出す（セグメントストアのfsyncなど）"""
+    with _record_stores_lock:
+        stores = list(_record_stores.values())
+    for store in stores:
+        store.flush()
+
+atexit.register(flush_record_stores)
@@ -0,0 +1,71 @@
+import os
+import time
+import logging
+
+from managers.post_manager import PostManager
+from managers.like_manager import LikeManager
+from managers.reply_manager import ReplyManager
+from managers.message_ref_manager import MessageRefManager
+from managers.action_manager import ActionManager
+from managers.count_manager import get_count_manager
+from managers.record_store import STORAGE_BACKEND_ENV, get_record_store
+from managers.search_session import SearchSessionStore
+from managers.snapshot import SnapshotWriter, load_snapshot, snapshot_enabled
+
+logger = logging.getLogger(__name__)
+
+class ManagerRegistry:
+    """ボット全体で共有するマネージャーのインスタンスを保持"""
+    
+    def __init__(self, base_dir: str = "data", backend: str = None):
+        self.base_dir = base_dir
+        self.backend = backend or os.getenv(STORAGE_BACKEND_ENV, "json")
+        started = time.perf_counter()
+        
+        # JSONファイルの場合はスナップショットからキャッシュを復元してから各インデックスを構築する
+        self.snapshot_stats = None
+        self.snapshot_writer = None
+        use_snapshot = self.backend == "json" and snapshot_enabled()
+        if use_snapshot:
+            self.snapshot_stats = load_snapshot(base_dir, get_record_store(base_dir))
+        
+        if self.backend == "sqlite":
+            if os.getenv("GITHUB_ACTIONS") == "true":
+                # data/thoughts.db はGitHubに同期されないため、チェックアウトし直すと変更が失われる
+                logger.warning("SQLiteのデータベースはGitHubに同期されません。GitHub Actionsでは再起動のたびに変更が失われます")
+            from managers.sqlite_manager import SQLitePostManager, SQLiteLikeManager, SQLiteReplyManager
+            self.post_manager = SQLitePostManager(base_dir)
+            # 初回のみ既存のJSONファイルを取り込む（2回目以降はスキップされる）
+            self.post_manager.store.import_from_data_dir(base_dir)
+            self.like_manager = SQLiteLikeManager(base_dir)
+            self.reply_manager = SQLiteReplyManager(base_dir)
+        else:
+            self.post_manager = PostManager(base_dir)
+            self.like_manager = LikeManager(base_dir)
+            self.reply_manager = ReplyManager(base_dir)
+        
+        self.message_ref_manager = MessageRefManager(base_dir)
+        self.action_manager = ActionManager(base_dir)
+        self.count_manager = get_count_manager(base_dir)
+        # 検索結果のページ送り用のカーソル（メモリ上のみ）
+        self.search_sessions = SearchSessionStore()
+        
+        self.ready_time_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(
+            f"マネージャーを初期化しました: backend={self.backend}, {self.ready_time_ms}ms "
+            f"(スナップショット: {'使用' if self.snapshot_stats else '未使用'})"
+        )
+        
+        if use_snapshot:
+            # スナップショットが無い・古い場合は次回の間隔で書き直す
+            dirty = not self.snapshot_stats or bool(self.snapshot_stats['changed_dirs'])
+            self.snapshot_writer = SnapshotWriter(base_dir, get_record_store(base_dir), dirty=dirty)
+            self.snapshot_writer.start()
+
+def get_managers(bot) -> ManagerRegistry:
+    """ボットに紐づく共有レジストリを取得（setup_hook前に呼ばれた場合はここで作成）"""
+    registry = getattr(bot, 'managers', None)
+    if registry is None:
+        registry = ManagerRegistry()
+        bot.managers = registry
+    return registry
@@ -1,9 +1,18 @@
-import json
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from datetime import datetime
 
+from managers.sequence_manager import get_sequence_manager
+from managers.memory_utils import estimate_size
+from managers.count_manager import get_count_manager
+from managers.record_store import get_record_store
+from managers.time_index import TimeIndex
+from managers.query_cache import QueryCache
+from managers.text_index import NgramIndex
+
 logger = logging.getLogger(__name__)
 
 class ReplyManager:
@@ -13,13 +22,171 @@ class ReplyManager:
         self.base_dir = base_dir
         self.replies_dir = os.path.join(base_dir, "replies")
         os.makedirs(self.replies_dir, exist_ok=True)
+        
+        # ID採番（全マネージャーで共有）
+        self.sequence_manager = get_sequence_manager(base_dir)
+        
+        # レコードの読み書き（全マネージャーで共有）
+        self.record_store = get_record_store(base_dir)
+        
+        # メモリ上のインデックス
+        self.index_lock = threading.RLock()
+        self._replies: Dict[int, Dict[str, Any]] = {}
+        self._replies_by_post: Dict[int, List[int]] = {}
+        self._replies_by_user: Dict[str, List[int]] = {}
+        self._replies_by_time = TimeIndex()
+        self.index_stats: Dict[str, Any] = {}
+        # リプライの追加・更新・削除のたびに進む世代と、それをキーに含む検索結果のキャッシュ
+        self._data_generation = 0
+        self.query_cache = QueryCache()
+        # あいまい検索用の本文のn-gramインデックス（初回のあいまい検索時に構築し、以降は差分更新）
+        self._text_index = NgramIndex()
+        self._text_index_ready = False
+        # git pullなど外部での変更を検知するためのディレクトリの世代
+        self._index_generation = self.record_store.directory_generation(self.replies_dir)
+        self._build_indexes()
+        
+        # 投稿ごとの件数カウンター（全マネージャーで共有）
+        self.count_manager = get_count_manager(base_dir)
+        self._sync_counts()
+    
+    def _build_indexes(self) -> None:
+        """リプライファイルを一度だけ読み込んでインデックスを構築"""
+        started = time.perf_counter()
+        
+        with self.index_lock:
+            self._replies.clear()
+            self._replies_by_post.clear()
+            self._replies_by_user.clear()
+            self._replies_by_time.clear()
+            self._text_index_ready = False
+            
+            # スナップショットから復元済みのレコードはファイルを読まずに使われる
+            for filename, reply_data in self.record_store.read_all(self.replies_dir):
+                if not filename.startswith('reply_'):
+                    continue
+                try:
+                    self._index_reply(reply_data)
+                except (KeyError, TypeError, ValueError):
+                    continue
+            
+            self.index_stats = {
+                'replies': len(self._replies),
+                'build_time_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        
+        logger.info(
+            f"リプライインデックスを構築しました: {self.index_stats['replies']}件, "
+            f"{self.index_stats['build_time_ms']}ms"
+        )
+    
+    def _index_reply(self, reply_data: Dict[str, Any]) -> None:
+        """リプライをインデックスに追加"""
+        self._data_generation += 1
+        reply_id = int(reply_data['id'])
+        if reply_id in self._replies:
+            self._unindex_reply(reply_id)
+        
+        self._replies[reply_id] = reply_data
+        for index, key in ((self._replies_by_post, reply_data.get('post_id')),
+                           (self._replies_by_user, reply_data.get('user_id'))):
+            ids = index.setdefault(key, [])
+            ids.append(reply_id)
+            ids.sort()
+        # 作成日時は追加時に1回だけ解析する
+        self._replies_by_time.add(reply_id, reply_data.get('created_at'))
+        self._index_reply_text(reply_data)
+    
+    def _unindex_reply(self, reply_id: int) -> None:
+        """リプライをインデックスから削除"""
+        self._data_generation += 1
+        reply_data = self._replies.pop(reply_id, None)
+        if not reply_data:
+            return
+        
+        self._replies_by_time.remove(reply_id)
+        self._unindex_reply_text(reply_id)
+        for index, key in ((self._replies_by_post, reply_data.get('post_id')),
+                           (self._replies_by_user, reply_data.get('user_id'))):
+            ids = index.get(key)
+            if ids and reply_id in ids:
+                ids.remove(reply_id)
+                if not ids:
+                    del index[key]
+    
+    def _index_reply_text(self, reply_data: Dict[str, Any]) -> None:
+        """あいまい検索用インデックスにリプライを反映（未構築の場合は構築時にまとめて反映される）"""
+        with self.index_lock:
+            if self._text_index_ready:
+                self._text_index.add(int(reply_data['id']), (reply_data.get('content'),))
+    
+    def _unindex_reply_text(self, reply_id: int) -> None:
+        """あいまい検索用インデックスからリプライを削除"""
+        with self.index_lock:
+            if self._text_index_ready:
+                self._text_index.remove(int(reply_id))
+    
+    def _get_indexed_reply(self, reply_id) -> Optional[Dict[str, Any]]:
+        """インデックスからリプライを取得（IDは文字列でも可）"""
+        try:
+            reply_id = int(reply_id)
+        except (TypeError, ValueError):
+            return None
+        return self._replies.get(reply_id)
+    
+    def _get_replies_by_ids(self, reply_ids: List[int]) -> List[Dict[str, Any]]:
+        """IDのリストからリプライのコピーを取得（呼び出し側の変更がインデックスに影響しないように）"""
+        return [dict(self._replies[reply_id]) for reply_id in reply_ids]
+    
+    def _refresh_if_changed(self) -> None:
+        """リプライファイルが外部で変更されていればインデックスとカウンターを作り直す"""
+        generation = self.record_store.directory_generation(self.replies_dir)
+        if generation == self._index_generation:
+            return
+        
+        with self.index_lock:
+            self._index_generation = generation
+            self._build_indexes()
+            self._sync_counts(force=True)
+    
+    def _sync_counts(self, force: bool = False) -> None:
+        """投稿ごとのリプライ数カウンターを実データと突き合わせる"""
+        with self.index_lock:
+            self.count_manager.ensure_consistent(
+                'replies', len(self._replies),
+                lambda: {post_id: len(ids) for post_id, ids in self._replies_by_post.items()},
+                force=force
+            )
+    
+    def get_data_generation(self) -> int:
+        """リプライの追加・更新・削除のたびに進む世代（外部での変更も確認してから返す）"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._data_generation
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """検索結果キャッシュの件数・メモリ量・ヒット率を取得"""
+        return self.query_cache.get_stats()
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """インデックスの件数・構築時間・メモリ使用量を取得"""
+        with self.index_lock:
+            stats = dict(self.index_stats)
+            stats['replies'] = len(self._replies)
+            # メモリ量の推定は全件をたどるため起動時ではなく要求された時に計算する
+            stats['memory_bytes'] = estimate_size([self._replies, self._replies_by_post, self._replies_by_user])
+            return stats
     
     def get_next_reply_id(self) -> int:
         """次のリプライIDを取得"""
-        existing_replies = [f for f in os.listdir(self.replies_dir) if f.endswith('.json')]
-        if not existing_replies:
-            return 1
-        
+        return self.sequence_manager.next_id(
+            'replies', self._scan_max_reply_id,
+            lambda reply_id: self.record_store.exists(os.path.join(self.replies_dir, f"reply_{reply_id}.json"))
+        )
+    
+    def _scan_max_reply_id(self) -> int:
+        """既存ファイルから最大のリプライIDを取得（採番の初期化時のみ使用）"""
+        existing_replies = self.record_store.list_names(self.replies_dir)
         max_id = 0
         for filename in existing_replies:
             try:
@@ -28,7 +195,7 @@ class ReplyManager:
             except ValueError:
                 continue
         
-        return max_id + 1
+        return max_id
     
     def save_reply(self, post_id: int, user_id: str, content: str, display_name: str) -> int:
         """リプライを保存"""
@@ -44,45 +211,71 @@ class ReplyManager:
         }
         
         filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(reply_data, f, ensure_ascii=False, indent=2)
+        self.record_store.write(filename, reply_data)
+        
+        with self.index_lock:
+            self._index_reply(reply_data)
+            self.count_manager.increment(post_id, 'replies')
         
         logger.info(f"リプライを保存しました: reply_id={reply_id}, post_id={post_id}, user_id={user_id}")
         return reply_id
     
     def get_replies(self, post_id: int) -> List[Dict[str, Any]]:
         """投稿のリプライを取得"""
-        replies = []
-        
-        for filename in sorted(os.listdir(self.replies_dir)):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply = json.load(f)
-                    
-                    if reply.get('post_id') == post_id:
-                        replies.append(reply)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
-        
-        return replies
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_replies_by_ids(self._replies_by_post.get(post_id, []))
     
     def get_replies_by_user(self, user_id: str) -> List[Dict[str, Any]]:
         """ユーザーのリプライを取得"""
-        user_replies = []
-        
-        for filename in sorted(os.listdir(self.replies_dir)):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply_data = json.load(f)
-                    
-                    if reply_data.get('user_id') == user_id:
-                        user_replies.append(reply_data)
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_replies_by_ids(self._replies_by_user.get(user_id, []))
+    
+    def get_replies_by_ids(self, reply_ids: List[int]) -> List[Dict[str, Any]]:
+        """IDの順にリプライを取得（削除済みのIDは除く）"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_replies_by_ids([reply_id for reply_id in reply_ids if reply_id in self._replies])
+    
+    def get_user_replies(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのリプライを取得（get_replies_by_userの別名）"""
+        return self.get_replies_by_user(user_id)
+    
+    def get_all_replies(self) -> List[Dict[str, Any]]:
+        """全リプライを取得"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            return self._get_replies_by_ids(sorted(self._replies))
+    
+    def iter_replies_by_time(self, date_from: datetime = None, date_to: datetime = None,
+                             newest_first: bool = True) -> Iterator[Dict[str, Any]]:
+        """期間内（両端を含む）のリプライを作成日時順に1件ずつ返す"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            reply_ids = self._replies_by_time.range_ids(date_from, date_to, newest_first)
         
-        return user_replies
+        for reply_id in reply_ids:
+            with self.index_lock:
+                reply_data = self._replies.get(reply_id)
+            if reply_data is not None:
+                yield dict(reply_data)
+    
+    def fuzzy_search_reply_ids(self, keyword: str) -> List[Tuple[int, float]]:
+        """本文がキーワードに似ているリプライのIDと一致率（一致率の高い順、誤字・表記揺れを許容）"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            if not self._text_index_ready:
+                started = time.perf_counter()
+                self._text_index.clear()
+                for reply_data in self.get_all_replies():
+                    self._text_index.add(int(reply_data['id']), (reply_data.get('content'),))
+                self._text_index_ready = True
+                logger.info(
+                    f"リプライのあいまい検索用インデックスを構築しました: {len(self._text_index.texts)}件, "
+                    f"{round((time.perf_counter() - started) * 1000, 2)}ms"
+                )
+            return self._text_index.similar(keyword)
     
     def get_replies_by_post_id(self, post_id: int) -> List[Dict[str, Any]]:
         """投稿IDから全リプライを取得"""
@@ -90,17 +283,11 @@ class ReplyManager:
     
     def get_reply_by_id_and_user(self, reply_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """リプライIDとユーザーIDからリプライデータを取得"""
-        for filename in os.listdir(self.replies_dir):
-            if filename.startswith('reply_') and filename.endswith('.json'):
-                try:
-                    with open(os.path.join(self.replies_dir, filename), 'r', encoding='utf-8') as f:
-                        reply_data = json.load(f)
-                    
-                    if (str(reply_data.get('id')) == str(reply_id) and 
-                        reply_data.get('user_id') == user_id):
-                        return reply_data
-                except (json.JSONDecodeError, FileNotFoundError):
-                    continue
+        self._refresh_if_changed()
+        with self.index_lock:
+            reply_data = self._get_indexed_reply(reply_id)
+            if reply_data and reply_data.get('user_id') == user_id:
+                return dict(reply_data)
         return None
     
     def delete_reply(self, reply_id: str, user_id: str) -> bool:
@@ -109,69 +296,71 @@ class ReplyManager:
         if not reply_data:
             return False
         
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
-        try:
-            os.remove(filename)
-            return True
-        except FileNotFoundError:
+        filename = os.path.join(self.replies_dir, f"reply_{reply_data['id']}.json")
+        if not self.record_store.delete(filename):
             return False
-    
-    def update_reply(self, post_id: int, reply_id: int, content: str) -> bool:
-        """リプライを更新"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
         
-        if not os.path.exists(filename):
-            return False
-        
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
-            
-            if reply_data.get('post_id') != post_id:
+        with self.index_lock:
+            self._unindex_reply(int(reply_data['id']))
+            self.count_manager.increment(reply_data.get('post_id'), 'replies', -1)
+        return True
+    
+    def update_reply(self, post_id: int = None, reply_id: int = None, content: str = None) -> bool:
+        """リプライを更新（post_idを指定した場合は親投稿も照合する）"""
+        self._refresh_if_changed()
+        with self.index_lock:
+            reply_data = self._get_indexed_reply(reply_id)
+            if not reply_data:
                 return False
             
-            reply_data['content'] = content
-            reply_data['updated_at'] = datetime.now().isoformat()
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(reply_data, f, ensure_ascii=False, indent=2)
+            if post_id is not None and reply_data.get('post_id') != post_id:
+                return False
             
-            return True
-        except (json.JSONDecodeError, FileNotFoundError):
-            return False
+            reply_data = dict(reply_data)
+        
+        reply_data['content'] = content
+        reply_data['updated_at'] = datetime.now().isoformat()
+        
+        filename = os.path.join(self.replies_dir, f"reply_{reply_data['id']}.json")
+        self.record_store.write(filename, reply_data)
+        
+        with self.index_lock:
+            self._index_reply(reply_data)
+        
+        return True
     
     def update_reply_message_id(self, reply_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
         """リプライファイルにメッセージIDを更新"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
+        self._refresh_if_changed()
+        with self.index_lock:
+            reply_data = self._get_indexed_reply(reply_id)
+            if not reply_data:
+                logger.warning(f"リプライメッセージID更新失敗: reply_id={reply_id}")
+                return
+            reply_data = dict(reply_data)
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
-            
-            reply_data['message_id'] = message_id
-            reply_data['channel_id'] = channel_id
-            if forwarded_message_id:
-                reply_data['forwarded_message_id'] = forwarded_message_id
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(reply_data, f, ensure_ascii=False, indent=2)
-                
-            logger.info(f"リプライメッセージIDを更新しました: reply_id={reply_id}")
-        except (json.JSONDecodeError, FileNotFoundError):
-            logger.warning(f"リプライメッセージID更新失敗: reply_id={reply_id}")
+        reply_data['message_id'] = message_id
+        reply_data['channel_id'] = channel_id
+        if forwarded_message_id:
+            reply_data['forwarded_message_id'] = forwarded_message_id
+        
+        filename = os.path.join(self.replies_dir, f"reply_{reply_data['id']}.json")
+        self.record_store.write(filename, reply_data)
+        
+        with self.index_lock:
+            self._index_reply(reply_data)
+        
+        logger.info(f"リプライメッセージIDを更新しました: reply_id={reply_id}")
     
     def get_reply_message_ref(self, reply_id: int) -> Optional[Dict[str, Any]]:
         """リプライのmessage_refを取得"""
-        filename = os.path.join(self.replies_dir, f"reply_{reply_id}.json")
-        
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                reply_data = json.load(f)
+        with self.index_lock:
+            reply_data = self._get_indexed_reply(reply_id)
+            if not reply_data:
+                return None
             
             return {
                 'message_id': reply_data.get('message_id'),
                 'channel_id': reply_data.get('channel_id'),
                 'forwarded_message_id': reply_data.get('forwarded_message_id')
             }
-        except (json.JSONDecodeError, FileNotFoundError):
-            return None
@@ -0,0 +1,88 @@
+import time
+import logging
+import secrets
+from typing import Dict, Any, List, Optional, Tuple
+
+from managers.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 最後に使われてから破棄するまでの時間（秒）
+SEARCH_SESSION_TTL_SECONDS = 30 * 60
+# 保持するセッションの上限
+SEARCH_SESSION_MAX_ENTRIES = 1000
+SEARCH_SESSION_MAX_BYTES = 2 * 1024 * 1024
+
+class SearchSession:
+    """検索結果のカーソル（並べたIDだけを持ち、各ページの内容は表示時に読み込む）"""
+    
+    def __init__(self, search_type: str, result_ids: List[int],
+                 category_counts: Optional[List[Tuple[str, int]]] = None):
+        self.search_type = search_type
+        self.result_ids = list(result_ids)
+        self.category_counts = category_counts
+        self.last_used = time.monotonic()
+    
+    def page_ids(self, page: int, items_per_page: int) -> List[int]:
+        """指定ページのID"""
+        start = (page - 1) * items_per_page
+        return self.result_ids[start:start + items_per_page]
+    
+    def estimate_size(self) -> int:
+        """おおよそのメモリ量（バイト）"""
+        size = 200 + 36 * len(self.result_ids)
+        if self.category_counts:
+            size += sum(80 + len(label.encode('utf-8')) for label, _ in self.category_counts)
+        return size
+
+class SearchSessionStore:
+    """検索セッションの保持（最後に使われてから一定時間で期限切れ、件数・メモリ量の上限を超えたら古い順に破棄）"""
+    
+    def __init__(self, ttl: float = SEARCH_SESSION_TTL_SECONDS,
+                 max_entries: int = SEARCH_SESSION_MAX_ENTRIES, max_bytes: int = SEARCH_SESSION_MAX_BYTES):
+        self.ttl = ttl
+        self.sessions = LRUCache(max_entries, max_bytes, sizeof=lambda session: session.estimate_size())
+    
+    def _is_expired(self, session: SearchSession, now: float) -> bool:
+        """最後に使われてから期限を過ぎたか"""
+        return now - session.last_used > self.ttl
+    
+    def add(self, session: SearchSession) -> str:
+        """セッションを登録してIDを返す（ついでに期限切れのセッションを破棄）"""
+        now = time.monotonic()
+        expired = self.sessions.prune(lambda stored: self._is_expired(stored, now))
+        if expired:
+            logger.info(f"期限切れの検索セッションを破棄しました: {expired}件")
+        
+        session_id = secrets.token_hex(8)
+        session.last_used = now
+        self.sessions.put(session_id, session)
+        return session_id
+    
+    def update(self, session_id: str, session: SearchSession) -> None:
+        """セッションの内容が変わった場合に登録し直す（メモリ量を計算し直す）"""
+        session.last_used = time.monotonic()
+        self.sessions.put(session_id, session)
+    
+    def get(self, session_id: str) -> Optional[SearchSession]:
+        """セッションを取得（期限切れ・破棄済みの場合はNone）"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        
+        now = time.monotonic()
+        if self._is_expired(session, now):
+            self.sessions.invalidate(session_id)
+            return None
+        session.last_used = now
+        return session
+    
+    def discard(self, session_id: str) -> bool:
+        """セッションを破棄"""
+        return self.sessions.invalidate(session_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """セッション数・メモリ量・ヒット率を取得"""
+        stats = self.sessions.get_stats()
+        stats['ttl_seconds'] = self.ttl
+        return stats
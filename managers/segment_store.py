@@ -0,0 +1,473 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Set
+
+from managers.serializer import dumps, loads
+from managers.storage_layout import StorageLayout, SHARDED_DIRS
+from managers.record_store import fsync_directory
+
+logger = logging.getLogger(__name__)
+
+# 1セグメントの最大サイズ（超えたら新しいセグメントに切り替える）
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+# コンパクションを確認する間隔（秒）
+COMPACTION_INTERVAL_SECONDS = 300.0
+# 確定済みセグメントの不要データがこの割合を超えたらコンパクションする
+COMPACTION_GARBAGE_RATIO = 0.5
+
+# レコードヘッダー: crc32, キー長, 値の長さ, フラグ
+RECORD_HEADER = struct.Struct('<IIIB')
+# ヒントファイルのエントリ: キー長, 値の位置, 値の長さ
+HINT_HEADER = struct.Struct('<III')
+FLAG_PUT = 0
+FLAG_DELETE = 1
+# コンパクションの入力と出力を記録するファイル（書き終えた時点でコンパクションが確定する）
+COMPACTION_MANIFEST = "compaction.json"
+
+class SegmentStore:
+    """追記専用セグメントファイルによるキー・バリューストア
+    
+    レコードはアクティブなセグメントの末尾に追記し、キー -> (セグメント, 位置, 長さ) の
+    インデックスをメモリ上に持つ。確定済みのセグメントはmmapして読み込み、
+    起動時はセグメントごとのヒントファイルから値を読まずにインデックスを復元する。
+    """
+    
+    def __init__(self, segments_dir: str, max_segment_bytes: int = MAX_SEGMENT_BYTES):
+        self.segments_dir = segments_dir
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(segments_dir, exist_ok=True)
+        self.manifest_file = os.path.join(segments_dir, COMPACTION_MANIFEST)
+        
+        self.lock = threading.RLock()
+        # key -> (セグメント番号, 値の位置, 値の長さ)
+        self.keydir: Dict[str, Tuple[int, int, int]] = {}
+        # ディレクトリ -> ファイル名（list_names用）
+        self.names_by_dir: Dict[str, Set[str]] = {}
+        self.segment_sizes: Dict[int, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        
+        started = time.perf_counter()
+        self._recover_compaction()
+        segment_ids = self._list_segment_ids()
+        for segment_id in segment_ids:
+            self._load_segment(segment_id, is_active=segment_id == segment_ids[-1])
+        
+        self.active_id = segment_ids[-1] if segment_ids else 1
+        self.active = open(self._segment_path(self.active_id), 'ab')
+        self.segment_sizes.setdefault(self.active_id, self.active.tell())
+        
+        logger.info(
+            f"セグメントストアを読み込みました: {len(self.keydir)}件, {len(segment_ids)}セグメント, "
+            f"{round((time.perf_counter() - started) * 1000, 2)}ms"
+        )
+    
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.segments_dir, f"seg_{segment_id:06d}.log")
+    
+    def _hint_path(self, segment_id: int) -> str:
+        return os.path.join(self.segments_dir, f"seg_{segment_id:06d}.hint")
+    
+    def _compact_path(self, segment_id: int) -> str:
+        return f"{self._segment_path(segment_id)}.compact"
+    
+    def _recover_compaction(self) -> None:
+        """途中で止まったコンパクションを、確定済みなら最後まで進め、未確定なら出力を捨てる"""
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            logger.warning(f"途中で止まったコンパクションを完了させます: {manifest}")
+            # ヒントファイルは読み込み時に作り直される
+            self._finish_compaction(manifest['output'], manifest['inputs'])
+            os.remove(self.manifest_file)
+            fsync_directory(self.segments_dir)
+            return
+        
+        for filename in os.listdir(self.segments_dir):
+            if filename.endswith('.compact'):
+                logger.warning(f"確定していないコンパクションの出力を削除します: {filename}")
+                os.remove(os.path.join(self.segments_dir, filename))
+    
+    def _finish_compaction(self, output_id: int, input_ids: List[int]) -> None:
+        """確定したコンパクションの出力で置き換え、入力のセグメントを削除（何度実行してもよい）"""
+        # 置き換え前の出力のヒントが新しいセグメントに使われないよう先に消す
+        hint_path = self._hint_path(output_id)
+        if os.path.exists(hint_path):
+            os.remove(hint_path)
+        if os.path.exists(self._compact_path(output_id)):
+            os.replace(self._compact_path(output_id), self._segment_path(output_id))
+        fsync_directory(self.segments_dir)
+        
+        for segment_id in input_ids:
+            if segment_id == output_id:
+                continue
+            for path in (self._segment_path(segment_id), self._hint_path(segment_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+        fsync_directory(self.segments_dir)
+    
+    def _write_manifest(self, output_id: int, input_ids: List[int]) -> None:
+        """コンパクションの入力と出力を記録して確定させる"""
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'output': output_id, 'inputs': input_ids}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.manifest_file)
+        fsync_directory(self.segments_dir)
+    
+    def _list_segment_ids(self) -> List[int]:
+        """既存のセグメント番号を古い順に取得"""
+        segment_ids = []
+        for filename in os.listdir(self.segments_dir):
+            if filename.startswith('seg_') and filename.endswith('.log'):
+                try:
+                    segment_ids.append(int(filename[4:-4]))
+                except ValueError:
+                    continue
+        return sorted(segment_ids)
+    
+    def _set_location(self, key: str, location: Optional[Tuple[int, int, int]]) -> None:
+        """インデックスを更新（Noneは削除）"""
+        directory, name = os.path.split(key)
+        if location is None:
+            self.keydir.pop(key, None)
+            names = self.names_by_dir.get(directory)
+            if names:
+                names.discard(name)
+        else:
+            self.keydir[key] = location
+            self.names_by_dir.setdefault(directory, set()).add(name)
+    
+    def _load_segment(self, segment_id: int, is_active: bool) -> None:
+        """ヒントファイル、なければセグメント本体からインデックスを復元"""
+        hint_path = self._hint_path(segment_id)
+        if not is_active and os.path.exists(hint_path):
+            with open(hint_path, 'rb') as f:
+                data = f.read()
+            position = 0
+            while position + HINT_HEADER.size <= len(data):
+                key_len, value_offset, value_len = HINT_HEADER.unpack_from(data, position)
+                position += HINT_HEADER.size
+                key = data[position:position + key_len].decode('utf-8')
+                position += key_len
+                # 値の長さが0xFFFFFFFFのエントリは削除を表す
+                location = None if value_len == 0xFFFFFFFF else (segment_id, value_offset, value_len)
+                self._set_location(key, location)
+            self.segment_sizes[segment_id] = os.path.getsize(self._segment_path(segment_id))
+            return
+        
+        valid_end = 0
+        for key, flag, value_offset, value_len, record_end in self._scan_segment(segment_id):
+            self._set_location(key, (segment_id, value_offset, value_len) if flag == FLAG_PUT else None)
+            valid_end = record_end
+        
+        segment_path = self._segment_path(segment_id)
+        if os.path.getsize(segment_path) != valid_end:
+            # 書き込み途中でクラッシュした末尾のレコードは確定していないので切り詰める
+            logger.warning(f"セグメント末尾の不完全なレコードを切り詰めます: {segment_path}")
+            with open(segment_path, 'r+b') as f:
+                f.truncate(valid_end)
+        self.segment_sizes[segment_id] = valid_end
+        
+        if not is_active:
+            self._write_hint(segment_id)
+    
+    def _scan_segment(self, segment_id: int):
+        """セグメントのレコードを先頭から順に読む（壊れたレコードの手前で止まる）"""
+        with open(self._segment_path(segment_id), 'rb') as f:
+            data = f.read()
+        
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            crc, key_len, value_len, flag = RECORD_HEADER.unpack_from(data, position)
+            body_start = position + RECORD_HEADER.size
+            record_end = body_start + key_len + value_len
+            if record_end > len(data):
+                break
+            body = data[body_start:record_end]
+            if zlib.crc32(body + bytes([flag])) != crc:
+                break
+            key = body[:key_len].decode('utf-8')
+            yield key, flag, body_start + key_len, value_len, record_end
+            position = record_end
+    
+    def _write_hint(self, segment_id: int) -> None:
+        """確定済みセグメントのヒントファイルを作成"""
+        entries = []
+        for key, flag, value_offset, value_len, _ in self._scan_segment(segment_id):
+            key_bytes = key.encode('utf-8')
+            entries.append(HINT_HEADER.pack(len(key_bytes), value_offset,
+                                            value_len if flag == FLAG_PUT else 0xFFFFFFFF) + key_bytes)
+        
+        tmp_file = f"{self._hint_path(segment_id)}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(b''.join(entries))
+        os.replace(tmp_file, self._hint_path(segment_id))
+    
+    def _map(self, segment_id: int, end: int) -> mmap.mmap:
+        """セグメントのmmapを取得（アクティブなセグメントは伸びた分だけ張り直す）"""
+        segment_map = self._maps.get(segment_id)
+        if segment_map is None or len(segment_map) < end:
+            if segment_id == self.active_id:
+                self.active.flush()
+            with open(self._segment_path(segment_id), 'rb') as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment_id] = segment_map
+        return segment_map
+    
+    def _append(self, key: str, value: bytes, flag: int) -> Tuple[int, int, int]:
+        """アクティブなセグメントにレコードを追記"""
+        key_bytes = key.encode('utf-8')
+        body = key_bytes + value
+        header = RECORD_HEADER.pack(zlib.crc32(body + bytes([flag])), len(key_bytes), len(value), flag)
+        
+        offset = self.segment_sizes[self.active_id]
+        self.active.write(header + body)
+        self.segment_sizes[self.active_id] = offset + len(header) + len(body)
+        location = (self.active_id, offset + len(header) + len(key_bytes), len(value))
+        
+        if self.segment_sizes[self.active_id] >= self.max_segment_bytes:
+            self._rotate()
+        return location
+    
+    def _rotate(self) -> None:
+        """アクティブなセグメントを確定して新しいセグメントに切り替える"""
+        self.sync()
+        self.active.close()
+        self._write_hint(self.active_id)
+        self.active_id += 1
+        self.active = open(self._segment_path(self.active_id), 'ab')
+        self.segment_sizes[self.active_id] = 0
+    
+    def put(self, key: str, value: bytes) -> None:
+        """値を書き込む"""
+        with self.lock:
+            self._set_location(key, self._append(key, value, FLAG_PUT))
+    
+    def delete(self, key: str) -> bool:
+        """値を削除（削除レコードを追記）"""
+        with self.lock:
+            if key not in self.keydir:
+                return False
+            self._append(key, b'', FLAG_DELETE)
+            self._set_location(key, None)
+            return True
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """値を取得（open()を伴わずmmapから読む）"""
+        with self.lock:
+            location = self.keydir.get(key)
+            if location is None:
+                return None
+            segment_id, value_offset, value_len = location
+            segment_map = self._map(segment_id, value_offset + value_len)
+            return segment_map[value_offset:value_offset + value_len]
+    
+    def contains(self, key: str) -> bool:
+        with self.lock:
+            return key in self.keydir
+    
+    def list_names(self, directory: str) -> List[str]:
+        """ディレクトリに相当するキーのファイル名一覧"""
+        with self.lock:
+            return sorted(self.names_by_dir.get(directory, ()))
+    
+    def sync(self) -> None:
+        """アクティブなセグメントをディスクに永続化"""
+        with self.lock:
+            self.active.flush()
+            os.fsync(self.active.fileno())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """セグメント数・使用量・不要データの割合を取得"""
+        with self.lock:
+            live_bytes: Dict[int, int] = {}
+            for segment_id, _, value_len in self.keydir.values():
+                live_bytes[segment_id] = live_bytes.get(segment_id, 0) + value_len
+            total = sum(self.segment_sizes.values())
+            live = sum(live_bytes.values())
+            return {
+                'records': len(self.keydir),
+                'segments': len(self.segment_sizes),
+                'bytes': total,
+                'live_bytes': live,
+                'garbage_ratio': round(1 - live / total, 3) if total else 0.0
+            }
+    
+    def compact(self, min_garbage_ratio: float = COMPACTION_GARBAGE_RATIO) -> bool:
+        """確定済みセグメントをまとめて書き直し、削除・上書き済みのレコードを取り除く
+        
+        出力は入力の中で最も新しい番号を引き継ぐため、アクティブなセグメントより
+        古い扱いのまま（起動時の読み込み順が変わらない）。出力を書き終えてから
+        入力と出力をマニフェストに記録し、それを確定点として置き換え・削除を行う。
+        途中で止まった場合は次回の起動時に、確定前なら出力を捨て、確定後なら最後まで進める
+        （古いセグメントだけが残って削除済み・上書き済みのレコードが復活することはない）。
+        """
+        with self.lock:
+            sealed_ids = sorted(segment_id for segment_id in self.segment_sizes if segment_id != self.active_id)
+            if not sealed_ids:
+                return False
+            
+            sealed = set(sealed_ids)
+            live = [(key, location) for key, location in self.keydir.items() if location[0] in sealed]
+            sealed_bytes = sum(self.segment_sizes[segment_id] for segment_id in sealed_ids)
+            live_bytes = sum(location[2] for _, location in live)
+            if sealed_bytes == 0 or 1 - live_bytes / sealed_bytes < min_garbage_ratio:
+                return False
+            
+            values = []
+            for key, (segment_id, value_offset, value_len) in live:
+                segment_map = self._map(segment_id, value_offset + value_len)
+                values.append((key, segment_map[value_offset:value_offset + value_len]))
+        
+        # 書き直しはロックの外で行う
+        output_id = sealed_ids[-1]
+        tmp_file = self._compact_path(output_id)
+        new_locations: Dict[str, Tuple[int, int, int]] = {}
+        with open(tmp_file, 'wb') as f:
+            offset = 0
+            for key, value in values:
+                key_bytes = key.encode('utf-8')
+                body = key_bytes + value
+                header = RECORD_HEADER.pack(zlib.crc32(body + bytes([FLAG_PUT])), len(key_bytes), len(value), FLAG_PUT)
+                f.write(header + body)
+                new_locations[key] = (output_id, offset + len(header) + len(key_bytes), len(value))
+                offset += len(header) + len(body)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        with self.lock:
+            old_locations = dict(live)
+            for key, location in new_locations.items():
+                # コンパクション中に上書き・削除されたキーはそのまま
+                if self.keydir.get(key) == old_locations[key]:
+                    self.keydir[key] = location
+            
+            for segment_id in sealed_ids:
+                self._maps.pop(segment_id, None)
+                self.segment_sizes.pop(segment_id, None)
+            self._write_manifest(output_id, sealed_ids)
+            self._finish_compaction(output_id, sealed_ids)
+            self.segment_sizes[output_id] = offset
+            self._write_hint(output_id)
+            os.remove(self.manifest_file)
+        
+        logger.info(f"セグメントをコンパクションしました: {len(sealed_ids)}セグメント -> 1, {len(values)}件")
+        return True
+    
+    def close(self) -> None:
+        with self.lock:
+            self.sync()
+            self.active.close()
+
+class SegmentRecordStore:
+    """RecordStoreと同じ読み書きAPIをセグメントストアで提供（STORAGE_BACKEND=segment）
+    
+    マネージャーが使うフラット配置のパスをbase_dirからの相対パスとしてキーにする。
+    """
+    
+    def __init__(self, base_dir: str = "data", compaction_interval: float = COMPACTION_INTERVAL_SECONDS):
+        self.base_dir = base_dir
+        self.segments = SegmentStore(os.path.join(base_dir, "segments"))
+        
+        # 初回は既存のJSONファイルを取り込む
+        if not self.segments.keydir:
+            self.import_files()
+        
+        self.compaction_interval = compaction_interval
+        self._stop_event = threading.Event()
+        self._compaction_thread = threading.Thread(target=self._compaction_loop, name="segment-compactor", daemon=True)
+        self._compaction_thread.start()
+    
+    def _key(self, path: str) -> str:
+        return os.path.relpath(os.path.normpath(path), self.base_dir).replace(os.sep, '/')
+    
+    def import_files(self) -> int:
+        """既存のJSONファイル（フラット・シャード配置）をセグメントに取り込む"""
+        layout = StorageLayout(self.base_dir)
+        imported = 0
+        for relative_dir in SHARDED_DIRS:
+            directory = os.path.join(self.base_dir, relative_dir)
+            for filename in sorted(layout.list_names(directory)):
+                path = os.path.join(directory, filename)
+                for candidate in layout.candidates(path):
+                    try:
+                        with open(candidate, 'rb') as f:
+                            self.segments.put(self._key(path), f.read())
+                        imported += 1
+                        break
+                    except FileNotFoundError:
+                        continue
+        
+        self.segments.sync()
+        if imported:
+            logger.info(f"JSONファイルをセグメントに取り込みました: {imported}件")
+        return imported
+    
+    def write(self, path: str, data: Dict[str, Any]) -> None:
+        """レコードを書き込む"""
+        self.segments.put(self._key(path), dumps(data))
+        self.segments.sync()
+    
+    def delete(self, path: str) -> bool:
+        """レコードを削除"""
+        deleted = self.segments.delete(self._key(path))
+        if deleted:
+            self.segments.sync()
+        return deleted
+    
+    def read(self, path: str) -> Optional[Dict[str, Any]]:
+        """レコードを読み込む（存在しない・壊れている場合はNone）"""
+        value = self.segments.get(self._key(path))
+        if value is None:
+            return None
+        try:
+            return loads(value)
+        except ValueError:
+            return None
+    
+    def exists(self, path: str) -> bool:
+        """レコードが存在するか確認"""
+        return self.segments.contains(self._key(path))
+    
+    def list_names(self, directory: str) -> List[str]:
+        """ディレクトリに相当するレコードのファイル名一覧"""
+        return self.segments.list_names(self._key(directory))
+    
+    def read_all(self, directory: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """ディレクトリに相当する全レコードを (ファイル名, データ) で取得"""
+        records = []
+        for name in self.list_names(directory):
+            data = self.read(os.path.join(directory, name))
+            if data is not None:
+                records.append((name, data))
+        return records
+    
+    def directory_generation(self, directory: str) -> int:
+        """セグメントはこのプロセスからしか書き換えられないので常に0"""
+        return 0
+    
+    def mark_external_change(self) -> None:
+        """外部での変更はセグメントに反映されないため何もしない"""
+    
+    def flush(self) -> None:
+        """書き込みは都度永続化しているため同期のみ"""
+        self.segments.sync()
+    
+    def _compaction_loop(self) -> None:
+        """一定間隔で不要データの割合を確認してコンパクションする"""
+        while not self._stop_event.wait(self.compaction_interval):
+            try:
+                self.segments.compact()
+            except Exception as e:
+                logger.error(f"セグメントのコンパクションでエラー: {e}")
+    
+    def close(self) -> None:
+        self._stop_event.set()
+        self.segments.close()
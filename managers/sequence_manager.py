@@ -0,0 +1,99 @@
+import os
+import atexit
+import logging
+import threading
+from typing import Dict, Callable, Optional
+
+from managers.serializer import dumps, load_file
+
+logger = logging.getLogger(__name__)
+
+# 一度のファイル書き込みで予約するIDの数（異常終了した場合は予約分が欠番になる）
+ID_BLOCK_SIZE = 32
+
+class SequenceManager:
+    """ID採番の管理"""
+
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        self.sequence_file = os.path.join(base_dir, ".sequences.json")
+        self.lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+        # 払い出し済みの最大ID
+        self.sequences = self._load()
+        # ファイルに書き込み済みの予約の上限（ここまでは書き込みなしで払い出せる）
+        self.reserved = dict(self.sequences)
+
+    def _load(self) -> Dict[str, int]:
+        """採番状態を読み込む"""
+        if not os.path.exists(self.sequence_file):
+            return {}
+
+        try:
+            return {name: int(value) for name, value in load_file(self.sequence_file).items()}
+        except (ValueError, AttributeError, OSError) as e:
+            # 壊れている場合は既存ファイルから再シードする
+            logger.warning(f"採番ファイルを読み込めないため再シードします: {e}")
+            return {}
+
+    def _save(self, values: Dict[str, int]) -> None:
+        """採番状態を保存（一時ファイルに書いてから置き換えるためクラッシュしても壊れない）"""
+        tmp_file = f"{self.sequence_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(dumps(values))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.sequence_file)
+
+    def next_id(self, name: str, seed: Callable[[], int],
+                is_used: Optional[Callable[[int], bool]] = None) -> int:
+        """次のIDを払い出す
+
+        Args:
+            name: 採番対象の名前 (例: "posts", "likes")
+            seed: 初回のみ呼ばれ、既存データの最大IDを返す関数
+            is_used: IDが既に使われているかを判定する関数（git pullで外部から増えた場合の保険）
+        """
+        with self.lock:
+            if name not in self.sequences:
+                self.sequences[name] = seed()
+                logger.info(f"採番を初期化しました: {name}={self.sequences[name]}")
+
+            next_id = self.sequences[name] + 1
+            while is_used and is_used(next_id):
+                next_id += 1
+
+            self.sequences[name] = next_id
+            if next_id > self.reserved.get(name, 0):
+                # 予約を使い切ったら次のブロックをまとめて予約する
+                self.reserved[name] = next_id + ID_BLOCK_SIZE - 1
+                self._save({**self.sequences, **self.reserved})
+            return next_id
+
+    def flush(self) -> None:
+        """未使用の予約を解放して払い出し済みの値を保存（正常終了・同期時に欠番を出さないため）"""
+        with self.lock:
+            if self.reserved == self.sequences:
+                return
+            self._save(self.sequences)
+            self.reserved = dict(self.sequences)
+
+_sequence_managers: Dict[str, SequenceManager] = {}
+_sequence_managers_lock = threading.Lock()
+
+def get_sequence_manager(base_dir: str = "data") -> SequenceManager:
+    """base_dirごとに共有されるSequenceManagerを取得"""
+    key = os.path.abspath(base_dir)
+    with _sequence_managers_lock:
+        if key not in _sequence_managers:
+            _sequence_managers[key] = SequenceManager(base_dir)
+        return _sequence_managers[key]
+
+def flush_sequence_managers() -> None:
+    """全てのSequenceManagerの採番状態を書き出す"""
+    with _sequence_managers_lock:
+        managers = list(_sequence_managers.values())
+    for manager in managers:
+        manager.flush()
+
+atexit.register(flush_sequence_managers)
@@ -0,0 +1,192 @@
+import json
+import os
+import sys
+import time
+import logging
+from typing import Dict, Any, List
+
+# 高速なシリアライザーは任意依存（未インストールなら標準のjsonを使う）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# レコードファイルの書き込み形式を指定する環境変数（json / json-pretty / orjson / msgpack）
+SERIALIZER_ENV = "DATA_SERIALIZER"
+
+class JsonSerializer:
+    """標準のjsonによるコンパクトな形式（インデントなし）"""
+    
+    name = "json"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class PrettyJsonSerializer:
+    """従来のインデント付き形式（差分を読みやすくしたい場合用）"""
+    
+    name = "json-pretty"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+class OrjsonSerializer:
+    """orjsonによるコンパクトな形式"""
+    
+    name = "orjson"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+class MsgpackSerializer:
+    """msgpackによるバイナリ形式（最小だが人が読めない）"""
+    
+    name = "msgpack"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+def available_serializers() -> Dict[str, Any]:
+    """インストール状況に応じて使えるシリアライザーの一覧"""
+    serializers = {
+        JsonSerializer.name: JsonSerializer(),
+        PrettyJsonSerializer.name: PrettyJsonSerializer()
+    }
+    if orjson is not None:
+        serializers[OrjsonSerializer.name] = OrjsonSerializer()
+    if msgpack is not None:
+        serializers[MsgpackSerializer.name] = MsgpackSerializer()
+    return serializers
+
+def get_serializer(name: str = None):
+    """書き込みに使うシリアライザーを取得（未指定なら環境変数、なければ最速のJSON）"""
+    serializers = available_serializers()
+    name = name or os.getenv(SERIALIZER_ENV)
+    if name:
+        if name in serializers:
+            return serializers[name]
+        logger.warning(f"シリアライザー {name} は利用できないため既定の形式を使います")
+    return serializers.get(OrjsonSerializer.name) or serializers[JsonSerializer.name]
+
+_serializer = get_serializer()
+
+def dumps(obj: Any) -> bytes:
+    """レコードをバイト列に変換"""
+    return _serializer.dumps(obj)
+
+def loads(data: bytes) -> Any:
+    """バイト列をレコードに変換（インデント付き・コンパクトJSON・msgpackを自動判別）
+    
+    Raises:
+        ValueError: 解析できない場合
+    """
+    head = data.lstrip()[:1]
+    if head in (b'{', b'['):
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data.decode('utf-8'))
+    
+    if not head:
+        raise ValueError("空のデータです")
+    if msgpack is None:
+        raise ValueError("msgpack形式のデータですがmsgpackがインストールされていません")
+    return msgpack.unpackb(data, raw=False)
+
+def dumps_line(obj: Any) -> str:
+    """JSONL用に1行のJSON文字列に変換（形式の設定に関わらず常にJSON）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def loads_line(line: str) -> Any:
+    """1行のJSON文字列を変換
+    
+    Raises:
+        ValueError: 解析できない場合
+    """
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+def load_file(path: str) -> Any:
+    """ファイルを読み込んで変換
+    
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合
+        ValueError: 解析できない場合
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+def dump_file(path: str, obj: Any) -> None:
+    """ファイルに書き込む"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj))
+
+def _collect_records(base_dir: str) -> List[bytes]:
+    """data/配下のレコードファイルをすべて読み込む"""
+    raw_records = []
+    for directory in [os.path.join(base_dir, "posts", "public"), os.path.join(base_dir, "posts", "private"),
+                      os.path.join(base_dir, "likes"), os.path.join(base_dir, "replies"),
+                      os.path.join(base_dir, "actions"), os.path.join(base_dir, "message_refs")]:
+        # シャード配置のサブディレクトリも含めて読み込む
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.json'):
+                    with open(os.path.join(root, filename), 'rb') as f:
+                        raw_records.append(f.read())
+    return raw_records
+
+def benchmark(base_dir: str = "data", rounds: int = 5) -> List[Dict[str, Any]]:
+    """現在のデータで形式ごとの書き込み・読み込み時間とディスク上のサイズを計測"""
+    raw_records = _collect_records(base_dir)
+    records = [loads(raw) for raw in raw_records]
+    
+    results = [{
+        'serializer': 'current files',
+        'records': len(raw_records),
+        'bytes': sum(len(raw) for raw in raw_records)
+    }]
+    
+    for serializer in available_serializers().values():
+        started = time.perf_counter()
+        for _ in range(rounds):
+            encoded = [serializer.dumps(record) for record in records]
+        dump_ms = (time.perf_counter() - started) * 1000 / rounds
+        
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for data in encoded:
+                loads(data)
+        load_ms = (time.perf_counter() - started) * 1000 / rounds
+        
+        results.append({
+            'serializer': serializer.name,
+            'records': len(encoded),
+            'bytes': sum(len(data) for data in encoded),
+            'dump_ms': round(dump_ms, 2),
+            'load_ms': round(load_ms, 2)
+        })
+    
+    return results
+
+def main():
+    """コマンドラインからベンチマークを実行: python -m managers.serializer [data_dir]"""
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    results = benchmark(base_dir)
+    
+    print(f"{'serializer':<14} {'records':>8} {'bytes':>10} {'dump_ms':>9} {'load_ms':>9}")
+    for result in results:
+        print(f"{result['serializer']:<14} {result['records']:>8} {result['bytes']:>10} "
+              f"{result.get('dump_ms', '-'):>9} {result.get('load_ms', '-'):>9}")
+    print(f"書き込みに使われる形式: {get_serializer().name}")
+
+if __name__ == "__main__":
+    main()
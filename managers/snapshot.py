@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, Iterator, Optional
+
+from managers.serializer import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = ".snapshot"
+SNAPSHOT_FORMAT = "bot2-snapshot"
+SNAPSHOT_VERSION = 2
+# スナップショットに含めるディレクトリ
+SNAPSHOT_DIRS = ("posts/public", "posts/private", "message_refs", "replies", "likes")
+# 起動時にはインデックスを作らず、必要時に読み込まれるディレクトリ（キャッシュに登録しておく）
+CACHED_DIRS = ("posts/public", "posts/private", "message_refs")
+# 変更があった場合にスナップショットを書き直す間隔（秒）
+SNAPSHOT_INTERVAL_SECONDS = 300
+# スナップショットを使わない場合は 0 を指定する環境変数
+SNAPSHOT_ENV = "DATA_SNAPSHOT"
+
+def snapshot_enabled() -> bool:
+    """環境変数でスナップショットが無効化されていないか確認"""
+    return os.getenv(SNAPSHOT_ENV, "1") != "0"
+
+def _iter_record_files(directory: str) -> Iterator[str]:
+    """ディレクトリ内のレコードファイルのパス（シャード配置のサブディレクトリも含む）"""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith('.json'):
+                yield os.path.normpath(os.path.join(root, filename))
+
+def git_blob_id(raw: bytes) -> str:
+    """ファイルの内容からgitのblob ID（git hash-objectと同じ値）を計算"""
+    return hashlib.sha1(b'blob %d\0' % len(raw) + raw).hexdigest()
+
+def _git_blob_ids(base_dir: str) -> Dict[str, str]:
+    """gitのインデックスにあり、作業ツリーで変更されていないファイルのblob ID（base_dirからの相対パス -> ID）
+    
+    チェックアウトし直してもファイルの内容が同じなら値は変わらないため、
+    更新時刻が変わるGitHub Actionsの新しいチェックアウトでもスナップショットを検証できる。
+    gitが使えない場合は空（更新時刻とサイズでの検証だけになる）。
+    """
+    try:
+        staged = subprocess.run(['git', 'ls-files', '-s', '-z', '--', *SNAPSHOT_DIRS], cwd=base_dir,
+                                capture_output=True, check=True).stdout
+        modified = subprocess.run(['git', 'ls-files', '-m', '-z', '--', *SNAPSHOT_DIRS], cwd=base_dir,
+                                  capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    
+    modified_paths = set(modified.decode('utf-8', 'surrogateescape').split('\0'))
+    blob_ids = {}
+    for line in staged.decode('utf-8', 'surrogateescape').split('\0'):
+        if not line:
+            continue
+        info, path = line.split('\t', 1)
+        path = os.path.normpath(path)
+        if path not in modified_paths:
+            blob_ids[path] = info.split()[1]
+    return blob_ids
+
+def write_snapshot(base_dir: str, record_store) -> Dict[str, Any]:
+    """全レコードを1つのファイルにまとめて書き出す
+    
+    ファイルは1行目がJSONのヘッダー（形式・バージョン・長さ・SHA-256）、
+    それ以降が本体。レコードごとに (mtime_ns, size, gitのblob ID) を持たせて読み込み時に1件ずつ検証する。
+    """
+    started = time.perf_counter()
+    directories: Dict[str, Dict[str, Any]] = {}
+    record_count = 0
+    for relative_dir in SNAPSHOT_DIRS:
+        directory = os.path.normpath(os.path.join(base_dir, relative_dir))
+        records: Dict[str, list] = {}
+        for path in _iter_record_files(directory):
+            try:
+                stat = os.stat(path)
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                # 読み込み中に書き換えられたファイルは含めない
+                if os.stat(path).st_mtime_ns != stat.st_mtime_ns:
+                    continue
+                records[os.path.relpath(path, directory)] = [stat.st_mtime_ns, stat.st_size, git_blob_id(raw), loads(raw)]
+            except (OSError, ValueError):
+                continue
+        directories[relative_dir] = {'records': records}
+        record_count += len(records)
+    
+    created_at = datetime.now().isoformat()
+    payload = dumps({'created_at': created_at, 'directories': directories})
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created_at': created_at,
+        'records': record_count,
+        'length': len(payload),
+        'sha256': hashlib.sha256(payload).hexdigest()
+    }
+    
+    snapshot_file = os.path.join(base_dir, SNAPSHOT_FILE)
+    tmp_file = f"{snapshot_file}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, snapshot_file)
+    
+    stats = {
+        'records': record_count,
+        'bytes': len(payload),
+        'write_time_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+    logger.info(f"スナップショットを書き出しました: {stats['records']}件, 約{stats['bytes'] // 1024}KB, {stats['write_time_ms']}ms")
+    return stats
+
+def _read_snapshot(snapshot_file: str) -> Dict[str, Any]:
+    """スナップショットを読み込んで検証
+    
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合
+        ValueError: 形式・バージョン・チェックサムが一致しない場合
+    """
+    with open(snapshot_file, 'rb') as f:
+        header = json.loads(f.readline())
+        payload = f.read()
+    
+    if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"対応していない形式です: {header.get('format')} v{header.get('version')}")
+    if header.get('length') != len(payload):
+        raise ValueError(f"長さが一致しません: {header.get('length')} != {len(payload)}")
+    if header.get('sha256') != hashlib.sha256(payload).hexdigest():
+        raise ValueError("チェックサムが一致しません")
+    return loads(payload)
+
+def load_snapshot(base_dir: str, record_store) -> Optional[Dict[str, Any]]:
+    """スナップショットからレコードを復元してRecordStoreに登録
+    
+    レコードごとに、gitのインデックスのblob ID（作業ツリーで変更されていないもの）、
+    またはファイルの (mtime_ns, size) が書き出し時と一致したものだけを使う。
+    前者はチェックアウトし直しても変わらないため、GitHub Actionsの新しいチェックアウトでも使える。
+    一致しないファイルと新しいファイルはインデックス構築時に通常どおり読み込まれる。
+    スナップショットが使えない場合はNone（全ファイルを読み込む従来の起動になる）。
+    """
+    started = time.perf_counter()
+    snapshot_file = os.path.join(base_dir, SNAPSHOT_FILE)
+    try:
+        snapshot = _read_snapshot(snapshot_file)
+        directories = snapshot['directories']
+    except FileNotFoundError:
+        logger.info("スナップショットがないため全ファイルを読み込みます")
+        return None
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        logger.warning(f"スナップショットが無効なため全ファイルを読み込みます: {e}")
+        return None
+    
+    blob_ids = _git_blob_ids(base_dir)
+    restored = 0
+    replayed = 0
+    changed_dirs = []
+    for relative_dir in SNAPSHOT_DIRS:
+        entry = directories.get(relative_dir)
+        directory = os.path.normpath(os.path.join(base_dir, relative_dir))
+        if not entry:
+            changed_dirs.append(relative_dir)
+            continue
+        
+        # スナップショットにないファイルがあるディレクトリは次回のスナップショットで書き直す
+        changed = any(os.path.relpath(path, directory) not in entry['records']
+                      for path in _iter_record_files(directory))
+        
+        preloaded: Dict[str, Dict[str, Any]] = {}
+        cached = relative_dir in CACHED_DIRS
+        for relative_path, (mtime_ns, size, blob_id, data) in entry['records'].items():
+            path = os.path.join(directory, relative_path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                changed = True
+                continue
+            if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size) and \
+                    blob_ids.get(os.path.normpath(os.path.join(relative_dir, relative_path))) != blob_id:
+                replayed += 1
+                changed = True
+                continue
+            
+            if cached:
+                # 必要時に読み込まれるディレクトリはキャッシュにだけ登録する（二重に保持しない）
+                record_store.seed_cache(path, (stat.st_mtime_ns, stat.st_size), dumps(data))
+            else:
+                preloaded[os.path.basename(relative_path)] = data
+            restored += 1
+        
+        if changed:
+            changed_dirs.append(relative_dir)
+        if not cached:
+            record_store.preload(directory, preloaded)
+    
+    stats = {
+        'created_at': snapshot.get('created_at'),
+        'restored': restored,
+        'replayed': replayed,
+        'changed_dirs': changed_dirs,
+        'load_time_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+    logger.info(
+        f"スナップショットを読み込みました: {restored}件を復元, {replayed}件はファイルから再読み込み, "
+        f"変更のあったディレクトリ={changed_dirs}, {stats['load_time_ms']}ms (作成: {stats['created_at']})"
+    )
+    return stats
+
+class SnapshotWriter:
+    """一定間隔で、前回から変更があればスナップショットを書き直すバックグラウンドスレッド"""
+    
+    def __init__(self, base_dir: str, record_store, interval: float = SNAPSHOT_INTERVAL_SECONDS,
+                 dirty: bool = False):
+        self.base_dir = base_dir
+        self.record_store = record_store
+        self.interval = interval
+        # スナップショットが無い・古い場合は変更がなくても次回書き出す
+        self.dirty = dirty
+        self._written_state = self._state()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+    
+    def start(self) -> None:
+        """スレッドを開始"""
+        self._thread.start()
+    
+    def _state(self) -> tuple:
+        """自分の書き込み回数と、外部での変更（git pullの通知・ディレクトリの更新時刻）の世代"""
+        return (getattr(self.record_store, 'write_count', 0),
+                tuple(self.record_store.directory_generation(os.path.join(self.base_dir, relative_dir))
+                      for relative_dir in SNAPSHOT_DIRS))
+    
+    def write_if_changed(self) -> bool:
+        """変更があればファイルへ反映してからスナップショットを書き出す"""
+        state = self._state()
+        if not self.dirty and state == self._written_state:
+            return False
+        
+        self.record_store.flush()
+        write_snapshot(self.base_dir, self.record_store)
+        self._written_state = state
+        self.dirty = False
+        return True
+    
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write_if_changed()
+            except Exception as e:
+                logger.error(f"スナップショットの書き出しでエラー: {e}")
+    
+    def stop(self) -> None:
+        """スレッドを停止"""
+        self._stop_event.set()
+
+def _measure_ready(base_dir: str) -> None:
+    """ManagerRegistryの初期化までの時間を出力（計測用の子プロセスで実行）"""
+    from managers.registry import ManagerRegistry
+    registry = ManagerRegistry(base_dir)
+    print(json.dumps({'ready_time_ms': registry.ready_time_ms, 'snapshot': registry.snapshot_stats}))
+
+def measure_time_to_ready(base_dir: str = "data") -> Dict[str, Any]:
+    """スナップショットあり・なしそれぞれで新しいプロセスを起動し、準備完了までの時間を計測"""
+    results = {}
+    for label, enabled in (('without_snapshot', '0'), ('with_snapshot', '1')):
+        env = dict(os.environ, **{SNAPSHOT_ENV: enabled})
+        completed = subprocess.run(
+            [sys.executable, '-m', 'managers.snapshot', base_dir, '--measure'],
+            capture_output=True, text=True, env=env, check=True
+        )
+        results[label] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return results
+
+def main():
+    """コマンドラインから実行: python -m managers.snapshot [data_dir]（書き出して起動時間を比較）"""
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    if '--measure' in sys.argv[2:]:
+        _measure_ready(base_dir)
+        return
+    
+    logging.basicConfig(level=logging.INFO)
+    from managers.record_store import get_record_store
+    print(write_snapshot(base_dir, get_record_store(base_dir)))
+    for label, result in measure_time_to_ready(base_dir).items():
+        print(f"{label}: {result['ready_time_ms']}ms {result['snapshot'] or ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+import os
+import sys
+import logging
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Iterator, Iterable
+from datetime import datetime
+
+from managers.post_manager import PostManager
+from managers.like_manager import LikeManager
+from managers.reply_manager import ReplyManager
+from managers.record_store import get_record_store
+from managers.serializer import dumps_line, loads_line
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    category TEXT,
+    is_private INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_user_id ON posts(user_id);
+CREATE INDEX IF NOT EXISTS idx_posts_category ON posts(category);
+CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts(created_at);
+
+CREATE TABLE IF NOT EXISTS likes (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_likes_post_id ON likes(post_id);
+CREATE INDEX IF NOT EXISTS idx_likes_user_id ON likes(user_id);
+CREATE INDEX IF NOT EXISTS idx_likes_post_user ON likes(post_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_likes_created_at ON likes(created_at);
+
+CREATE TABLE IF NOT EXISTS replies (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_replies_post_id ON replies(post_id);
+CREATE INDEX IF NOT EXISTS idx_replies_user_id ON replies(user_id);
+CREATE INDEX IF NOT EXISTS idx_replies_created_at ON replies(created_at);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class SQLiteStore:
+    """SQLiteデータベース接続の管理
+
+    データベースファイルはGitHubに同期されないため、永続的なディスクがある環境でのみ使う
+    （STORAGE_BACKEND=sqliteを指定した場合のみ、既定はJSONファイル）。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # discord.pyのイベントループ以外からも使えるようにスレッドチェックを無効化し、ロックで保護する
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def fetch_one(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        """1行を取得"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def fetch_all(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        """全行を取得"""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def execute(self, sql: str, params: tuple = ()) -> int:
+        """更新系SQLを実行して変更行数を返す"""
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor.rowcount
+
+    def max_id(self, table: str) -> int:
+        """テーブルの最大のIDを取得（採番の初期化時のみ使用、主キーのインデックスを使うためO(log n)）"""
+        row = self.fetch_one(f"SELECT MAX(id) FROM {table}")
+        return row[0] or 0
+
+    def id_exists(self, table: str, record_id: int) -> bool:
+        """IDが既に使われているか確認"""
+        return self.fetch_one(f"SELECT 1 FROM {table} WHERE id = ?", (record_id,)) is not None
+
+    def next_id(self, sequence_manager, table: str) -> int:
+        """次のIDを共有の採番から払い出す（JSONファイルの場合と同じく、削除されたIDは再利用しない）"""
+        return sequence_manager.next_id(table, lambda: self.max_id(table),
+                                        lambda record_id: self.id_exists(table, record_id))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """メタ情報を取得"""
+        row = self.fetch_one("SELECT value FROM meta WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """メタ情報を保存"""
+        self.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def upsert_post(self, post_data: Dict[str, Any]) -> None:
+        """投稿を保存"""
+        self.execute(
+            "INSERT OR REPLACE INTO posts (id, user_id, category, is_private, created_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (post_data['id'], str(post_data.get('user_id')), post_data.get('category'),
+             1 if post_data.get('is_private') else 0, post_data.get('created_at'),
+             dumps_line(post_data))
+        )
+
+    def upsert_like(self, like_data: Dict[str, Any]) -> None:
+        """いいねを保存"""
+        self.execute(
+            "INSERT OR REPLACE INTO likes (id, post_id, user_id, created_at, data) VALUES (?, ?, ?, ?, ?)",
+            (like_data['id'], like_data.get('post_id'), str(like_data.get('user_id')),
+             like_data.get('created_at'), dumps_line(like_data))
+        )
+
+    def upsert_reply(self, reply_data: Dict[str, Any]) -> None:
+        """リプライを保存"""
+        self.execute(
+            "INSERT OR REPLACE INTO replies (id, post_id, user_id, created_at, data) VALUES (?, ?, ?, ?, ?)",
+            (reply_data['id'], reply_data.get('post_id'), str(reply_data.get('user_id')),
+             reply_data.get('created_at'), dumps_line(reply_data))
+        )
+
+    def import_from_data_dir(self, base_dir: str = "data", force: bool = False) -> Dict[str, int]:
+        """既存のJSONファイル群（data/）を一括でインポート"""
+        if self.get_meta('imported_at') and not force:
+            logger.info("SQLiteへのインポートは実行済みのためスキップします")
+            return {}
+
+        # 以前のWALに残っている変更をファイルへ反映してから読み込む（シャード配置にも対応）
+        record_store = get_record_store(base_dir)
+
+        counts = {'posts': 0, 'likes': 0, 'replies': 0}
+        sources = [
+            ('posts', os.path.join(base_dir, "posts", "public"), self.upsert_post),
+            ('posts', os.path.join(base_dir, "posts", "private"), self.upsert_post),
+            ('likes', os.path.join(base_dir, "likes"), self.upsert_like),
+            ('replies', os.path.join(base_dir, "replies"), self.upsert_reply),
+        ]
+
+        with self.lock:
+            for kind, directory, upsert in sources:
+                if not os.path.exists(directory):
+                    continue
+
+                for filename in sorted(record_store.list_names(directory)):
+                    record = record_store.read(os.path.join(directory, filename))
+                    if record is None:
+                        logger.warning(f"インポートをスキップしました: {filename}")
+                        continue
+                    if 'id' not in record:
+                        continue
+                    upsert(record)
+                    counts[kind] += 1
+
+            self.set_meta('imported_at', datetime.now().isoformat())
+
+        logger.info(f"SQLiteへのインポート完了: {counts}")
+        return counts
+
+def _load_rows(rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+    """dataカラムのJSONを辞書のリストに変換"""
+    return [loads_line(row['data']) for row in rows]
+
+class SQLitePostManager(PostManager):
+    """投稿機能の管理（SQLiteバックエンド）"""
+
+    def __init__(self, base_dir: str = "data", db_path: str = None):
+        # 親クラスの初期化中に所在インデックスの構築で使うため先に接続する
+        self.store = SQLiteStore(db_path or os.path.join(base_dir, "thoughts.db"))
+        super().__init__(base_dir)
+
+    def _post_path(self, post_id: int, is_private: bool) -> str:
+        """投稿のJSONファイルとしてのパス（所在インデックスの値に使う）"""
+        if is_private:
+            return os.path.join(self.private_posts_dir, f"private_post_{post_id}.json")
+        return os.path.join(self.public_posts_dir, f"public_post_{post_id}.json")
+
+    def _build_post_locations(self) -> None:
+        """投稿IDの所在インデックスを主キーから構築（存在確認をクエリなしで行う）"""
+        rows = self.store.fetch_all("SELECT id, is_private FROM posts")
+        with self.index_lock:
+            self._post_locations = {row[0]: (self._post_path(row[0], bool(row[1])), bool(row[1]))
+                                    for row in rows}
+        logger.info(f"投稿の所在インデックスを構築しました: {len(self._post_locations)}件")
+
+    def get_next_post_id(self) -> int:
+        """次の投稿IDを取得"""
+        return self.store.next_id(self.sequence_manager, 'posts')
+
+    def save_post(self, user_id: str, content: str, category: str = None,
+                  is_anonymous: bool = False, is_private: bool = False,
+                  display_name: str = None, message_id: str = None,
+                  channel_id: str = None, image_url: str = None) -> int:
+        """投稿を保存"""
+        with self.store.lock:
+            post_id = self.get_next_post_id()
+
+            content_to_save = content
+            if is_private:
+                content_to_save = self._encrypt_content(content)
+
+            post_data = {
+                "id": post_id,
+                "user_id": user_id,
+                "content": content_to_save,
+                "category": category,
+                "is_anonymous": is_anonymous,
+                "is_private": is_private,
+                "display_name": display_name,
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+                "message_id": message_id,
+                "channel_id": channel_id,
+                "image_url": image_url
+            }
+            self.store.upsert_post(post_data)
+        with self.index_lock:
+            self._post_locations[post_id] = (self._post_path(post_id, is_private), is_private)
+        self._index_post(post_data)
+
+        self._log_access(user_id, post_id, "create", is_private)
+        return post_id
+
+    def _get_raw_post(self, post_id: int) -> Optional[Dict[str, Any]]:
+        """暗号化されたままの投稿データを取得"""
+        row = self.store.fetch_one("SELECT data FROM posts WHERE id = ?", (post_id,))
+        return loads_line(row['data']) if row else None
+
+    def update_post_message_ref(self, post_id: int, message_id: str, channel_id: str) -> bool:
+        """投稿のmessage_idとchannel_idを更新"""
+        try:
+            with self.store.lock:
+                post_data = self._get_raw_post(post_id)
+                if not post_data:
+                    return False
+
+                post_data['message_id'] = message_id
+                post_data['channel_id'] = channel_id
+                post_data['updated_at'] = datetime.now().isoformat()
+                self.store.upsert_post(post_data)
+            return True
+        except Exception as e:
+            logger.error(f"投稿のmessage_ref更新中にエラー: {e}")
+            return False
+
+    def get_post(self, post_id: int, user_id: str = None) -> Optional[Dict[str, Any]]:
+        """投稿を取得"""
+        post_data = self._get_raw_post(post_id)
+        if not post_data:
+            return None
+
+        post_data = self._apply_access_rule(post_data, user_id)
+        if post_data:
+            self._log_access(user_id or "anonymous", post_id, "read", post_data.get('is_private', False))
+        return post_data
+
+    def _scan_posts(self, user_id: str = None, post_ids: Iterable[int] = None) -> Iterator[Dict[str, Any]]:
+        """閲覧可能な投稿を返す（非公開投稿は本人のものだけをSQL側で絞り込む）"""
+        conditions = "(is_private = 0 OR user_id = ?)"
+        params: List[Any] = [user_id or ""]
+        if post_ids is not None:
+            post_ids = list(dict.fromkeys(post_ids))
+            if not post_ids:
+                return
+            conditions += f" AND id IN ({', '.join('?' * len(post_ids))})"
+            params.extend(post_ids)
+
+        rows = self.store.fetch_all(f"SELECT data FROM posts WHERE {conditions} ORDER BY id", tuple(params))
+        posts = _load_rows(rows)
+        if post_ids is not None:
+            # 指定されたIDの順に並べ直す
+            order = {post_id: position for position, post_id in enumerate(post_ids)}
+            posts.sort(key=lambda post: order[post['id']])
+
+        for post_data in posts:
+            post = self._apply_access_rule(post_data, user_id)
+            if post:
+                yield post
+
+    def post_ids_by_user(self, user_id: str, newest_first: bool = False) -> List[int]:
+        """投稿者の投稿ID（user_idのインデックスで取得）"""
+        order = "created_at DESC, id DESC" if newest_first else "id"
+        rows = self.store.fetch_all(f"SELECT id FROM posts WHERE user_id = ? ORDER BY {order}", (str(user_id),))
+        return [row[0] for row in rows]
+
+    def _iter_raw_posts(self, post_ids: List[int] = None) -> Iterator[Dict[str, Any]]:
+        """投稿を保存されている形のまま返す（post_ids指定時はそのIDのみを指定の順に）"""
+        if post_ids is None:
+            yield from _load_rows(self.store.fetch_all("SELECT data FROM posts ORDER BY id"))
+            return
+        if not post_ids:
+            return
+
+        rows = self.store.fetch_all(
+            f"SELECT data FROM posts WHERE id IN ({', '.join('?' * len(post_ids))})", tuple(post_ids)
+        )
+        posts = {post['id']: post for post in _load_rows(rows)}
+        for post_id in post_ids:
+            if post_id in posts:
+                yield posts[post_id]
+
+    def update_post(self, post_id: int, content: str = None, category: str = None,
+                   image_url: str = None, user_id: str = None, message_id: str = None, channel_id: str = None) -> bool:
+        """投稿を更新"""
+        with self.store.lock:
+            post_data = self._get_raw_post(post_id)
+            if not post_data:
+                return False
+
+            if post_data.get('is_private'):
+                if not user_id or post_data.get('user_id') != user_id:
+                    return False
+
+            if content is not None:
+                if post_data.get('is_private'):
+                    post_data['content'] = self._encrypt_content(content)
+                else:
+                    post_data['content'] = content
+
+            if category is not None:
+                post_data['category'] = category
+
+            if image_url is not None:
+                post_data['image_url'] = image_url
+
+            if message_id is not None:
+                post_data['message_id'] = message_id
+
+            if channel_id is not None:
+                post_data['channel_id'] = channel_id
+
+            post_data['updated_at'] = datetime.now().isoformat()
+            self.store.upsert_post(post_data)
+        self._invalidate_decrypted(post_id)
+        self._index_post(post_data)
+
+        self._log_access(user_id or "anonymous", post_id, "update", post_data.get('is_private', False))
+        return True
+
+    def delete_post(self, post_id: int, user_id: str = None) -> bool:
+        """投稿を削除"""
+        with self.store.lock:
+            post_data = self._get_raw_post(post_id)
+            if not post_data:
+                return False
+
+            if post_data.get('is_private'):
+                if not user_id or post_data.get('user_id') != user_id:
+                    return False
+
+            self.store.execute("DELETE FROM posts WHERE id = ?", (post_id,))
+        with self.index_lock:
+            self._post_locations.pop(int(post_id), None)
+        self._invalidate_decrypted(post_id)
+        self._unindex_post(post_id)
+
+        self._log_access(user_id or "anonymous", post_id, "delete", post_data.get('is_private', False))
+        return True
+
+class SQLiteLikeManager(LikeManager):
+    """いいね機能の管理（SQLiteバックエンド）"""
+
+    def __init__(self, base_dir: str = "data", db_path: str = None):
+        # 親クラスの初期化中にカウンターの突き合わせで使うため先に接続する
+        self.store = SQLiteStore(db_path or os.path.join(base_dir, "thoughts.db"))
+        super().__init__(base_dir)
+
+    def _build_indexes(self) -> None:
+        """SQLite側のインデックスを使うため、メモリ上のインデックスは構築しない"""
+        self.index_stats = {'likes': 0, 'build_time_ms': 0.0, 'memory_bytes': 0}
+
+    def _sync_counts(self, force: bool = False) -> None:
+        """投稿ごとのいいね数カウンターをテーブルと突き合わせる"""
+        total = self.store.fetch_one("SELECT COUNT(*) FROM likes")[0]
+        self.count_manager.ensure_consistent(
+            'likes', total,
+            lambda: {row[0]: row[1] for row in self.store.fetch_all(
+                "SELECT post_id, COUNT(*) FROM likes GROUP BY post_id")},
+            force=force
+        )
+
+    def get_next_like_id(self) -> int:
+        """次のいいねIDを取得"""
+        return self.store.next_id(self.sequence_manager, 'likes')
+
+    def save_like(self, post_id: int, user_id: str, display_name: str) -> int:
+        """いいねを保存"""
+        with self.store.lock:
+            like_id = self.get_next_like_id()
+            like_data = {
+                "id": like_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "display_name": display_name,
+                "created_at": datetime.now().isoformat()
+            }
+            self.store.upsert_like(like_data)
+            self.count_manager.increment(post_id, 'likes')
+
+        logger.info(f"いいねを保存しました: like_id={like_id}, post_id={post_id}, user_id={user_id}")
+        return like_id
+
+    def get_likes(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿のいいねを取得"""
+        rows = self.store.fetch_all("SELECT data FROM likes WHERE post_id = ? ORDER BY id", (post_id,))
+        return _load_rows(rows)
+
+    def get_likes_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのいいねを取得"""
+        rows = self.store.fetch_all("SELECT data FROM likes WHERE user_id = ? ORDER BY id", (user_id,))
+        return _load_rows(rows)
+
+    def get_like_by_user_and_post(self, post_id: int, user_id: str) -> Optional[Dict[str, Any]]:
+        """ユーザーといいねされた投稿IDからいいねデータを取得"""
+        row = self.store.fetch_one(
+            "SELECT data FROM likes WHERE post_id = ? AND user_id = ? ORDER BY id LIMIT 1",
+            (post_id, user_id)
+        )
+        return loads_line(row['data']) if row else None
+
+    def delete_like(self, post_id: int, user_id: str) -> bool:
+        """いいねを削除"""
+        like_data = self.get_like_by_user_and_post(post_id, user_id)
+        if not like_data:
+            return False
+
+        with self.store.lock:
+            deleted = self.store.execute("DELETE FROM likes WHERE id = ?", (like_data['id'],)) > 0
+            if deleted:
+                self.count_manager.increment(like_data.get('post_id'), 'likes', -1)
+        return deleted
+
+    def update_like_message_id(self, like_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
+        """いいねにメッセージIDを更新"""
+        with self.store.lock:
+            row = self.store.fetch_one("SELECT data FROM likes WHERE id = ?", (like_id,))
+            if not row:
+                logger.warning(f"いいねメッセージID更新失敗: like_id={like_id}")
+                return
+
+            like_data = loads_line(row['data'])
+            like_data['message_id'] = message_id
+            like_data['channel_id'] = channel_id
+            if forwarded_message_id:
+                like_data['forwarded_message_id'] = forwarded_message_id
+            self.store.upsert_like(like_data)
+
+        logger.info(f"いいねメッセージIDを更新しました: like_id={like_id}")
+
+class SQLiteReplyManager(ReplyManager):
+    """リプライ機能の管理（SQLiteバックエンド）"""
+
+    def __init__(self, base_dir: str = "data", db_path: str = None):
+        # 親クラスの初期化中にカウンターの突き合わせで使うため先に接続する
+        self.store = SQLiteStore(db_path or os.path.join(base_dir, "thoughts.db"))
+        super().__init__(base_dir)
+
+    def _build_indexes(self) -> None:
+        """SQLite側のインデックスを使うため、メモリ上のインデックスは構築しない"""
+        self.index_stats = {'replies': 0, 'build_time_ms': 0.0, 'memory_bytes': 0}
+        # あいまい検索の索引は次回の検索時に作り直す
+        self._text_index_ready = False
+
+    def _sync_counts(self, force: bool = False) -> None:
+        """投稿ごとのリプライ数カウンターをテーブルと突き合わせる"""
+        total = self.store.fetch_one("SELECT COUNT(*) FROM replies")[0]
+        self.count_manager.ensure_consistent(
+            'replies', total,
+            lambda: {row[0]: row[1] for row in self.store.fetch_all(
+                "SELECT post_id, COUNT(*) FROM replies GROUP BY post_id")},
+            force=force
+        )
+
+    def get_next_reply_id(self) -> int:
+        """次のリプライIDを取得"""
+        return self.store.next_id(self.sequence_manager, 'replies')
+
+    def save_reply(self, post_id: int, user_id: str, content: str, display_name: str) -> int:
+        """リプライを保存"""
+        with self.store.lock:
+            reply_id = self.get_next_reply_id()
+            reply_data = {
+                "id": reply_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "content": content,
+                "display_name": display_name,
+                "created_at": datetime.now().isoformat()
+            }
+            self.store.upsert_reply(reply_data)
+            self.count_manager.increment(post_id, 'replies')
+            self._data_generation += 1
+            self._index_reply_text(reply_data)
+
+        logger.info(f"リプライを保存しました: reply_id={reply_id}, post_id={post_id}, user_id={user_id}")
+        return reply_id
+
+    def _get_raw_reply(self, reply_id: int) -> Optional[Dict[str, Any]]:
+        """IDからリプライを取得"""
+        try:
+            reply_id = int(reply_id)
+        except (TypeError, ValueError):
+            return None
+        row = self.store.fetch_one("SELECT data FROM replies WHERE id = ?", (reply_id,))
+        return loads_line(row['data']) if row else None
+
+    def get_replies(self, post_id: int) -> List[Dict[str, Any]]:
+        """投稿のリプライを取得"""
+        rows = self.store.fetch_all("SELECT data FROM replies WHERE post_id = ? ORDER BY id", (post_id,))
+        return _load_rows(rows)
+
+    def get_replies_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """ユーザーのリプライを取得"""
+        rows = self.store.fetch_all("SELECT data FROM replies WHERE user_id = ? ORDER BY id", (user_id,))
+        return _load_rows(rows)
+
+    def get_all_replies(self) -> List[Dict[str, Any]]:
+        """全リプライを取得"""
+        return _load_rows(self.store.fetch_all("SELECT data FROM replies ORDER BY id"))
+
+    def get_replies_by_ids(self, reply_ids: List[int]) -> List[Dict[str, Any]]:
+        """IDの順にリプライを取得（削除済みのIDは除く）"""
+        if not reply_ids:
+            return []
+        rows = self.store.fetch_all(
+            f"SELECT data FROM replies WHERE id IN ({', '.join('?' * len(reply_ids))})", tuple(reply_ids)
+        )
+        replies = {reply['id']: reply for reply in _load_rows(rows)}
+        return [replies[reply_id] for reply_id in reply_ids if reply_id in replies]
+
+    def iter_replies_by_time(self, date_from: datetime = None, date_to: datetime = None,
+                             newest_first: bool = True) -> Iterator[Dict[str, Any]]:
+        """期間内（両端を含む）のリプライを作成日時順に返す（created_atのインデックスを使う）"""
+        conditions = []
+        params: List[Any] = []
+        if date_from:
+            conditions.append("created_at >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            conditions.append("created_at <= ?")
+            params.append(date_to.isoformat())
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if newest_first else "ASC"
+        rows = self.store.fetch_all(
+            f"SELECT data FROM replies {where} ORDER BY created_at {direction}, id {direction}", tuple(params)
+        )
+        yield from _load_rows(rows)
+
+    def get_reply_by_id_and_user(self, reply_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """リプライIDとユーザーIDからリプライデータを取得"""
+        reply_data = self._get_raw_reply(reply_id)
+        if reply_data and reply_data.get('user_id') == user_id:
+            return reply_data
+        return None
+
+    def delete_reply(self, reply_id: str, user_id: str) -> bool:
+        """リプライを削除"""
+        reply_data = self.get_reply_by_id_and_user(reply_id, user_id)
+        if not reply_data:
+            return False
+
+        with self.store.lock:
+            deleted = self.store.execute("DELETE FROM replies WHERE id = ?", (reply_data['id'],)) > 0
+            if deleted:
+                self.count_manager.increment(reply_data.get('post_id'), 'replies', -1)
+                self._data_generation += 1
+                self._unindex_reply_text(reply_data['id'])
+        return deleted
+
+    def update_reply(self, post_id: int = None, reply_id: int = None, content: str = None) -> bool:
+        """リプライを更新（post_idを指定した場合は親投稿も照合する）"""
+        with self.store.lock:
+            reply_data = self._get_raw_reply(reply_id)
+            if not reply_data:
+                return False
+            if post_id is not None and reply_data.get('post_id') != post_id:
+                return False
+
+            reply_data['content'] = content
+            reply_data['updated_at'] = datetime.now().isoformat()
+            self.store.upsert_reply(reply_data)
+            self._data_generation += 1
+            self._index_reply_text(reply_data)
+        return True
+
+    def update_reply_message_id(self, reply_id: int, message_id: str, channel_id: str, forwarded_message_id: str = None) -> None:
+        """リプライにメッセージIDを更新"""
+        with self.store.lock:
+            reply_data = self._get_raw_reply(reply_id)
+            if not reply_data:
+                logger.warning(f"リプライメッセージID更新失敗: reply_id={reply_id}")
+                return
+
+            reply_data['message_id'] = message_id
+            reply_data['channel_id'] = channel_id
+            if forwarded_message_id:
+                reply_data['forwarded_message_id'] = forwarded_message_id
+            self.store.upsert_reply(reply_data)
+
+        logger.info(f"リプライメッセージIDを更新しました: reply_id={reply_id}")
+
+    def get_reply_message_ref(self, reply_id: int) -> Optional[Dict[str, Any]]:
+        """リプライのmessage_refを取得"""
+        reply_data = self._get_raw_reply(reply_id)
+        if not reply_data:
+            return None
+
+        return {
+            'message_id': reply_data.get('message_id'),
+            'channel_id': reply_data.get('channel_id'),
+            'forwarded_message_id': reply_data.get('forwarded_message_id')
+        }
+
+def main():
+    """既存のdata/をSQLiteにインポートする"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    base_dir = args[0] if args else "data"
+    store = SQLiteStore(os.path.join(base_dir, "thoughts.db"))
+    counts = store.import_from_data_dir(base_dir, force='--force' in sys.argv)
+    print(f"インポート結果: {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_VERSION = 1
+LAYOUT_FLAT = "flat"
+LAYOUT_SHARDED = "sharded"
+# 1シャードあたりのID数（like_12345.json -> likes/12/like_12345.json）
+DEFAULT_SHARD_SIZE = 1000
+
+# シャード化の対象ディレクトリ（base_dirからの相対パス）
+SHARDED_DIRS = ("posts/public", "posts/private", "likes", "replies", "actions", "message_refs")
+
+# 数値IDを持つファイル名（それ以外はファイル名のハッシュでシャードを決める）
+_ID_FILENAME = re.compile(r'^(?:public_post_|private_post_|like_|reply_|message_ref_)?(\d+)\.json$')
+
+class StorageLayout:
+    """レコードファイルの配置（フラット / シャード）の管理
+    
+    設定は data/.layout.json に保存する。移行が完了するまでは
+    書き込み先でない方の配置も読み込み時に探す。設定ファイルがない場合は
+    シャードディレクトリの有無で判定する（コミットされていないチェックアウトでも読めるように）。
+    """
+    
+    def __init__(self, base_dir: str = "data"):
+        self.base_dir = base_dir
+        self.layout_file = os.path.join(base_dir, ".layout.json")
+        self.lock = threading.Lock()
+        self.layout = LAYOUT_FLAT
+        self.shard_size = DEFAULT_SHARD_SIZE
+        self.complete = True
+        # 最後に読み込んだ設定ファイルの更新時刻（-1は未読み込み、Noneはファイルなし）
+        self._mtime_ns = -1
+        self._sharded_dirs = {os.path.normpath(os.path.join(base_dir, d)) for d in SHARDED_DIRS}
+        self.reload_if_changed()
+    
+    def reload_if_changed(self) -> bool:
+        """設定ファイルが更新されていれば読み込み直す"""
+        try:
+            mtime_ns = os.stat(self.layout_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        
+        with self.lock:
+            if mtime_ns == self._mtime_ns:
+                return False
+            self._mtime_ns = mtime_ns
+            
+            if mtime_ns is None:
+                if self._has_shard_dirs():
+                    # 設定はないがシャード配置のファイルがあるので、両方の配置を探す
+                    logger.warning("配置設定がありませんが、シャードディレクトリがあるためシャード配置として読み込みます")
+                    self.layout, self.shard_size, self.complete = LAYOUT_SHARDED, DEFAULT_SHARD_SIZE, False
+                else:
+                    self.layout, self.shard_size, self.complete = LAYOUT_FLAT, DEFAULT_SHARD_SIZE, True
+                return True
+            
+            try:
+                with open(self.layout_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.layout = data.get('layout', LAYOUT_FLAT)
+                self.shard_size = int(data.get('shard_size', DEFAULT_SHARD_SIZE))
+                self.complete = bool(data.get('complete', False))
+            except (json.JSONDecodeError, ValueError, OSError) as e:
+                # 読めない場合は両方の配置を探すようにして安全側に倒す
+                logger.warning(f"配置設定を読み込めません: {e}")
+                self.complete = False
+        
+        logger.info(f"レコードの配置: {self.layout} (shard_size={self.shard_size}, complete={self.complete})")
+        return True
+    
+    def _has_shard_dirs(self) -> bool:
+        """シャード化の対象ディレクトリにシャードのサブディレクトリがあるか確認"""
+        for directory in self._sharded_dirs:
+            try:
+                with os.scandir(directory) as entries:
+                    if any(entry.is_dir() for entry in entries):
+                        return True
+            except FileNotFoundError:
+                continue
+        return False
+    
+    def save(self, layout: str, complete: bool, shard_size: int = None) -> None:
+        """配置設定を保存"""
+        data = {
+            'version': LAYOUT_VERSION,
+            'layout': layout,
+            'shard_size': shard_size or self.shard_size,
+            'complete': complete
+        }
+        tmp_file = f"{self.layout_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.layout_file)
+        self.reload_if_changed()
+    
+    def is_sharded_dir(self, directory: str) -> bool:
+        """シャード化の対象ディレクトリか確認"""
+        return os.path.normpath(directory) in self._sharded_dirs
+    
+    def may_have_shards(self, directory: str) -> bool:
+        """シャードのサブディレクトリを探す必要があるか（シャード配置、または移行中の対象ディレクトリ）"""
+        with self.lock:
+            layout, complete = self.layout, self.complete
+        return self.is_sharded_dir(directory) and (layout == LAYOUT_SHARDED or not complete)
+    
+    def shard_name(self, filename: str) -> str:
+        """ファイル名からシャードディレクトリ名を決める"""
+        match = _ID_FILENAME.match(filename)
+        if match:
+            return str(int(match.group(1)) // self.shard_size)
+        # アクション記録などIDを持たないファイルはハッシュの先頭2桁で分散
+        return "h" + hashlib.md5(filename.encode('utf-8')).hexdigest()[:2]
+    
+    def path_for(self, path: str, layout: str) -> str:
+        """論理パス（フラット配置のパス）を指定した配置での実際のパスに変換"""
+        directory, filename = os.path.split(path)
+        if layout != LAYOUT_SHARDED or not self.is_sharded_dir(directory):
+            return path
+        return os.path.join(directory, self.shard_name(filename), filename)
+    
+    def candidates(self, path: str) -> List[str]:
+        """読み込み時に探す実際のパス（書き込み先の配置が先頭）"""
+        with self.lock:
+            layout, complete = self.layout, self.complete
+        
+        primary = self.path_for(path, layout)
+        if complete:
+            return [primary]
+        
+        other = self.path_for(path, LAYOUT_FLAT if layout == LAYOUT_SHARDED else LAYOUT_SHARDED)
+        return [primary] if other == primary else [primary, other]
+    
+    def list_names(self, directory: str) -> List[str]:
+        """ディレクトリ内のレコードファイル名（両方の配置をまとめて）"""
+        names = []
+        if not os.path.exists(directory):
+            return names
+        
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json'):
+                    names.append(entry.name)
+                elif self.is_sharded_dir(directory) and entry.is_dir():
+                    with os.scandir(entry.path) as shard_entries:
+                        names.extend(e.name for e in shard_entries if e.name.endswith('.json'))
+        return names
+
+def migrate(base_dir: str = "data", layout: str = LAYOUT_SHARDED, shard_size: int = DEFAULT_SHARD_SIZE,
+            grace_seconds: float = 2.0) -> Dict[str, int]:
+    """稼働中のまま既存ファイルを指定した配置へ移動
+    
+    先に配置設定を「未完了」で切り替えて新しい書き込みを移行先に向け、
+    読み込みは両方の配置を探す状態のままファイルを1件ずつ移動する。
+    移動し残しがなくなった時点で完了にする。
+    """
+    storage_layout = StorageLayout(base_dir)
+    storage_layout.save(layout, complete=False, shard_size=shard_size)
+    # 稼働中のボットが新しい設定を読み込むまで待つ
+    time.sleep(grace_seconds)
+    
+    moved: Dict[str, int] = {}
+    while True:
+        moved_in_pass = 0
+        for relative_dir in SHARDED_DIRS:
+            directory = os.path.join(base_dir, relative_dir)
+            for filename in storage_layout.list_names(directory):
+                flat_path = os.path.join(directory, filename)
+                target = storage_layout.path_for(flat_path, layout)
+                for source in storage_layout.candidates(flat_path)[1:]:
+                    if not os.path.exists(source):
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    if os.path.exists(target):
+                        # 移行先に新しい書き込みがある場合はそちらを正とする
+                        os.remove(source)
+                    else:
+                        os.replace(source, target)
+                    moved[relative_dir] = moved.get(relative_dir, 0) + 1
+                    moved_in_pass += 1
+        
+        logger.info(f"配置の移行: {moved_in_pass}件を移動しました")
+        if moved_in_pass == 0:
+            break
+    
+    # 空になったシャードディレクトリを片付ける（フラットへ戻した場合）
+    if layout == LAYOUT_FLAT:
+        for relative_dir in SHARDED_DIRS:
+            directory = os.path.join(base_dir, relative_dir)
+            if not os.path.exists(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir() and not os.listdir(entry.path):
+                        os.rmdir(entry.path)
+    
+    storage_layout.save(layout, complete=True, shard_size=shard_size)
+    logger.info(f"配置の移行が完了しました: {layout} {moved}")
+    return moved
+
+def main():
+    """コマンドラインから移行: python -m managers.storage_layout [data_dir] [sharded|flat]"""
+    logging.basicConfig(level=logging.INFO)
+    base_dir = sys.argv[1] if len(sys.argv) > 1 else "data"
+    layout = sys.argv[2] if len(sys.argv) > 2 else LAYOUT_SHARDED
+    if layout not in (LAYOUT_FLAT, LAYOUT_SHARDED):
+        print(f"配置は {LAYOUT_FLAT} か {LAYOUT_SHARDED} を指定してください")
+        sys.exit(1)
+    print(migrate(base_dir, layout))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import unicodedata
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+# カタカナ（ァ〜ヶ）をひらがなに揃える変換表
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# 本文とカテゴリーなど複数のフィールドの区切り（正規化後の検索語には現れない）
+FIELD_SEPARATOR = "\x00"
+
+# あいまい検索で一致とみなす、検索語のn-gramのうち文書に含まれるものの割合
+FUZZY_THRESHOLD = 0.3
+# この文字数以上の検索語はトライグラム、未満はバイグラムで比べる（短い語はトライグラムが少なすぎるため）
+FUZZY_TRIGRAM_MIN_LENGTH = 5
+
+def normalize_text(text: Optional[str]) -> str:
+    """検索用に正規化（NFKCで全角・半角を統一し、小文字化してカタカナをひらがなに揃える）"""
+    if not text:
+        return ""
+    return unicodedata.normalize('NFKC', text).lower().translate(_KATAKANA_TO_HIRAGANA)
+
+def _ngrams(text: str, n: int) -> Set[str]:
+    """文字n-gramの集合（フィールドの区切りをまたぐものは除く）"""
+    return {text[i:i + n] for i in range(len(text) - n + 1) if FIELD_SEPARATOR not in text[i:i + n]}
+
+class NgramIndex:
+    """文字バイグラム・トライグラムの転置インデックス
+
+    日本語は単語に分割できないため、正規化した文字列のn-gramごとに文書IDを持ち、
+    検索語のn-gramのポスティングを小さい順に積集合して候補を絞り込んでから
+    部分文字列一致で確認する。
+    """
+
+    def __init__(self):
+        # n-gram -> 文書IDの集合
+        self.postings: Dict[str, Set[int]] = {}
+        # 文書ID -> 正規化済みの文字列（候補の確認用）
+        self.texts: Dict[int, str] = {}
+
+    def add(self, doc_id: int, fields: Iterable[Optional[str]]) -> None:
+        """文書を追加（既にある場合は置き換え）"""
+        self.remove(doc_id)
+        text = FIELD_SEPARATOR.join(normalize_text(field) for field in fields)
+        self.texts[doc_id] = text
+        for gram in _ngrams(text, 2) | _ngrams(text, 3):
+            self.postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: int) -> bool:
+        """文書を削除"""
+        text = self.texts.pop(doc_id, None)
+        if text is None:
+            return False
+
+        for gram in _ngrams(text, 2) | _ngrams(text, 3):
+            doc_ids = self.postings.get(gram)
+            if doc_ids is not None:
+                doc_ids.discard(doc_id)
+                if not doc_ids:
+                    del self.postings[gram]
+        return True
+
+    def clear(self) -> None:
+        """全件を削除"""
+        self.postings.clear()
+        self.texts.clear()
+
+    def search(self, query: str) -> Set[int]:
+        """検索語を部分文字列として含む文書IDの集合"""
+        query = normalize_text(query)
+        if not query:
+            return set(self.texts)
+
+        if len(query) == 1:
+            # 1文字の検索語はn-gramで絞り込めないので保持している文字列を直接確認する
+            candidates: Iterable[int] = self.texts
+        else:
+            grams = _ngrams(query, 3) if len(query) >= 3 else {query}
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set(postings[0])
+            for doc_ids in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= doc_ids
+
+        return {doc_id for doc_id in candidates if query in self.texts[doc_id]}
+
+    def similar(self, query: str, threshold: float = FUZZY_THRESHOLD) -> List[Tuple[int, float]]:
+        """検索語に似た文字列を含む文書IDと一致率を、一致率の高い順に返す
+        
+        一致率は検索語のn-gramのうち文書に含まれるものの割合で、ポスティングを数えて求める
+        （文書の文字列とは比較しないため、誤字や表記揺れがあっても件数に比例した時間で済む）。
+        """
+        query = normalize_text(query)
+        if len(query) < 2:
+            return []
+        
+        grams = _ngrams(query, 3 if len(query) >= FUZZY_TRIGRAM_MIN_LENGTH else 2)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for doc_id in self.postings.get(gram, ()):
+                shared[doc_id] = shared.get(doc_id, 0) + 1
+        
+        scored = [(doc_id, count / len(grams)) for doc_id, count in shared.items() if count / len(grams) >= threshold]
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        return scored
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """文書数・n-gram数・ポスティングの総数を取得"""
+        return {
+            'documents': len(self.texts),
+            'grams': len(self.postings),
+            'postings': sum(len(doc_ids) for doc_ids in self.postings.values())
+        }
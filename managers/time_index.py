@@ -0,0 +1,91 @@
+import bisect
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+def to_epoch(value: Any) -> Optional[int]:
+    """ISO形式の日時（またはdatetime）をエポックからのマイクロ秒に変換（読めない場合はNone）"""
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        try:
+            moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except (ValueError, TypeError):
+            return None
+    return int(moment.timestamp() * 1_000_000)
+
+class TimeIndex:
+    """作成日時の昇順に並べた (エポック, ID) の配列
+    
+    ISO形式の解析は追加時の1回だけで、期間での絞り込みはbisect、
+    新しい順のN件はスライスで取り出す。日時が読めない記録は最も古いものとして扱う。
+    """
+    
+    def __init__(self):
+        self.entries: List[Tuple[int, int]] = []
+        self.epochs: Dict[int, int] = {}
+    
+    def add(self, record_id: int, created_at: Any) -> None:
+        """記録を追加（既にある場合は置き換え）"""
+        self.remove(record_id)
+        epoch = to_epoch(created_at) or 0
+        self.epochs[record_id] = epoch
+        entry = (epoch, record_id)
+        # ほとんどの追加は末尾なので先に確認する
+        if not self.entries or self.entries[-1] < entry:
+            self.entries.append(entry)
+        else:
+            bisect.insort(self.entries, entry)
+    
+    def remove(self, record_id: int) -> bool:
+        """記録を削除"""
+        epoch = self.epochs.pop(record_id, None)
+        if epoch is None:
+            return False
+        position = bisect.bisect_left(self.entries, (epoch, record_id))
+        if position < len(self.entries) and self.entries[position] == (epoch, record_id):
+            del self.entries[position]
+        return True
+    
+    def clear(self) -> None:
+        """全件を削除"""
+        self.entries.clear()
+        self.epochs.clear()
+    
+    def get_epoch(self, record_id: int) -> Optional[int]:
+        """記録の作成日時（エポックからのマイクロ秒）"""
+        return self.epochs.get(record_id)
+    
+    def range_ids(self, date_from: Any = None, date_to: Any = None,
+                  newest_first: bool = True, limit: int = None) -> List[int]:
+        """期間内（両端を含む）の記録のIDを作成日時順に取得"""
+        start = 0
+        end = len(self.entries)
+        if date_from is not None:
+            start = bisect.bisect_left(self.entries, (to_epoch(date_from) or 0, -1))
+        if date_to is not None:
+            end = bisect.bisect_right(self.entries, (to_epoch(date_to) or 0, float('inf')))
+        if start >= end:
+            return []
+        
+        if newest_first:
+            stop = max(start, end - limit) if limit else start
+            return [record_id for _, record_id in reversed(self.entries[stop:end])]
+        stop = min(end, start + limit) if limit else end
+        return [record_id for _, record_id in self.entries[start:stop]]
+    
+    def sort_ids(self, record_ids: Iterable[int], date_from: Any = None, date_to: Any = None,
+                 newest_first: bool = True) -> List[int]:
+        """指定したIDのうち期間内（両端を含む）のものを作成日時順に並べる（インデックスにないIDは除く）"""
+        low = (to_epoch(date_from) or 0) if date_from is not None else None
+        high = (to_epoch(date_to) or 0) if date_to is not None else None
+        entries = []
+        for record_id in record_ids:
+            epoch = self.epochs.get(record_id)
+            if epoch is None or (low is not None and epoch < low) or (high is not None and epoch > high):
+                continue
+            entries.append((epoch, record_id))
+        entries.sort(reverse=newest_first)
+        return [record_id for _, record_id in entries]
+    
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -30,6 +30,14 @@ async def sync_to_github(action_description: str, user_name: str = None, post_id
         with open(timestamp_file, 'w') as f:
             f.write(datetime.now().isoformat())
         
+        # バッファ中のアクセスログ、ストアの未反映分、採番状態を書き出してからコミット対象に含める
+        from managers.access_log import flush_access_logs
+        from managers.record_store import flush_record_stores, notify_record_stores_changed
+        from managers.sequence_manager import flush_sequence_managers
+        flush_access_logs()
+        flush_record_stores()
+        flush_sequence_managers()
+        
         # ファイルのタイムスタンプを更新
         if os.path.exists(data_dir):
             os.utime(data_dir)
@@ -61,6 +69,12 @@ async def sync_to_github(action_description: str, user_name: str = None, post_id
                      capture_output=True, text=True, check=False)
         subprocess.run(['git', 'add', 'data/.last_sync'], 
                      capture_output=True, text=True, check=False)
+        subprocess.run(['git', 'add', 'data/.layout.json'], 
+                     capture_output=True, text=True, check=False)
+        subprocess.run(['git', 'add', 'data/.sequences.json'], 
+                     capture_output=True, text=True, check=False)
+        subprocess.run(['git', 'add', 'data/.snapshot'], 
+                     capture_output=True, text=True, check=False)
         subprocess.run(['git', 'add', 'data/.gitkeep'], 
                      capture_output=True, text=True, check=False)
         
@@ -88,6 +102,8 @@ async def sync_to_github(action_description: str, user_name: str = None, post_id
                             # リモートの変更を取得してリベース
                             subprocess.run(['git', 'pull', '--rebase', 'origin', 'main'], 
                                          capture_output=True, text=True, check=False)
+                            # 取り込んだファイルをキャッシュ・インデックスに反映させる
+                            notify_record_stores_changed()
                             import time
                             time.sleep(2)
                         else: